@@ -6,14 +6,15 @@ os.environ.setdefault("SDL_AUDIODRIVER", "pulseaudio")
 
 import time
 import signal
+import asyncio
 import threading
-import subprocess
-import select
-from queue import Queue, Empty
-import re
+import inspect
+from typing import NamedTuple
 
-from rpi_ws281x import PixelStrip, Color, ws
-from evdev import InputDevice, ecodes
+try:
+    from evdev import InputDevice, ecodes
+except ImportError:   # np. benchmark na zwykłym Linuksie (LED_BACKEND=fake)
+    InputDevice = ecodes = None
 
 try:
     from dotenv import load_dotenv
@@ -21,22 +22,85 @@ try:
 except Exception:
     pass
 
+from led_backend import open_strips, strip_type
+from led_frame import FrameBuffer, Crossfade, ColorStage, BLACK, pack, changed
+from led_power import PowerLimiter
+import led_latency
+import led_log
+import dc_events
+import dc_rules
+import dc_ws
+from led_latency import Trace, traced, current_trace, monotonic_from_wall
+
 # ========= USTAWIENIA =========
-# --- LED strip ---
-LED_COUNT   = 28
-LED_PIN     = 18
-LED_DMA     = 10
-LED_FREQ_HZ = 800_000
-LED_INVERT  = False
-LED_CHANNEL = 0
-STRIP_TYPE  = ws.WS2811_STRIP_BRG   # whites: Color(WW,0,CW) -> WW=R, CW=B
-
-# ile LED ma działać dla WSZYSTKICH efektów poza snake
-ACTIVE_COUNT_NON_SNAKE = 22
-
-# zakres, na którym działa dart-caller (LED 23..28 -> indeksy 22..27)
-DART_START = 22
-DART_END   = 28   # exclusive
+# --- paski LED: jeden proces, po pasku na kanał PWM; w klatce leżą jeden za
+# drugim (piksele pierwszego, potem drugiego...). Pierwszy = tablica (main + dart),
+# każdy kolejny = jedna strefa o jego nazwie.
+# Kanały PWM 0 i 1 to jeden kontroler (zegar, FIFO, DMA): oba paski idą przez
+# jedno ws2811_t (led_backend.open_strips) z jedną częstotliwością i jednym DMA.
+PWM_FREQ_HZ = 800_000
+PWM_DMA = 10
+
+class StripConfig(NamedTuple):
+    name: str
+    count: int
+    pin: int
+    channel: int                # kanał PWM: 0 (GPIO 18) albo 1 (GPIO 13)
+    level: float = 1.0          # ułamek rejestru jasności (stała skala paska)
+    whites: bool = True         # nieparzyste = WW/CW (balans, krzywa white); False = sam RGB
+    invert: bool = False
+    strip_type: str = "BRG"     # whites: Color(WW,0,CW) -> WW=R, CW=B
+
+# układ: LED_BOARD_COUNT diod tablicy (kanał 0), z czego ostatnie LED_DART_COUNT
+# to segment dart-callera, a reszta — efekty pilota (main)
+BOARD_COUNT = int(os.getenv("LED_BOARD_COUNT", "28"))
+DART_COUNT = int(os.getenv("LED_DART_COUNT", "6"))
+# ring (dawny dart-caller-listener.py): 8 LED, pin 13, kanał 1, połowa jasności;
+# LED_RING_COUNT=0 -> bez ringu
+RING_COUNT = int(os.getenv("LED_RING_COUNT", "8"))
+if BOARD_COUNT < 1 or not 1 <= DART_COUNT <= BOARD_COUNT or RING_COUNT < 0:
+    raise ValueError(f"układ LED: LED_BOARD_COUNT={BOARD_COUNT} (>= 1), "
+                     f"LED_DART_COUNT={DART_COUNT} (1..LED_BOARD_COUNT), "
+                     f"LED_RING_COUNT={RING_COUNT} (>= 0)")
+STRIPS = [StripConfig("board", BOARD_COUNT, 18, 0)]
+if RING_COUNT > 0:   # listener: 1 MHz; wspólny kontroler PWM -> 800 kHz jak tablica
+    STRIPS.append(StripConfig("ring", RING_COUNT, 13, 1, level=0.5,
+                              whites=False, strip_type="GRB"))   # jak PixelStrip bez strip_type
+
+# początek każdego paska w klatce wyrównany do parzystego indeksu, żeby
+# even/odd (RGB / WW-CW) liczyły się od początku paska także przy nieparzystej
+# długości poprzedniego; piksel wyrównania nigdy nie idzie na pasek
+STRIP_STARTS = []
+_off = 0
+for _s in STRIPS:
+    _off += _off & 1
+    STRIP_STARTS.append(_off)
+    _off += _s.count
+LED_COUNT = _off                           # pikseli w klatce (paski + wyrównanie)
+LED_TOTAL = sum(s.count for s in STRIPS)   # diod fizycznie
+
+# ile LED ma działać dla WSZYSTKICH efektów poza snake (domyślnie 22)
+ACTIVE_COUNT_NON_SNAKE = BOARD_COUNT - DART_COUNT
+
+# zakres, na którym działa dart-caller (domyślnie LED 23..28 -> indeksy 22..27)
+DART_START = ACTIVE_COUNT_NON_SNAKE
+DART_END   = BOARD_COUNT   # exclusive
+
+# --- korekcja przy commicie: krzywe gamma RGB (even) i WW/CW (odd); 1.0 = bez zmian
+GAMMA_RGB = float(os.getenv("LED_GAMMA_RGB", "1.0"))
+GAMMA_WHITE = float(os.getenv("LED_GAMMA_WHITE", "1.0"))
+
+# --- pętla renderująca: stały FPS dla wszystkich animacji
+RENDER_FPS = int(os.getenv("LED_FPS", "50"))
+
+# --- opóźnienia zdarzenie -> show(): raport dopisywany na SIGUSR1 i przy wyjściu
+LATENCY_FILE = os.getenv("LED_LATENCY_FILE", "/tmp/autodarts-led-latency.txt")
+# --- logi: poziom LOG_LEVEL; ostatnie linie (bufor) przy awarii i na SIGUSR1
+LOG_DUMP_FILE = os.getenv("LED_LOG_DUMP", "/tmp/autodarts-led-log.txt")
+log = led_log.get("led")
+log_ir = led_log.get("ir", rate=10)
+log_dc = led_log.get("dc", rate=20)        # linie darts-callera: hałaśliwe
+log_render = led_log.get("render", rate=5)
 
 # --- IR kody ---
 IR_ON           = 0xef1f
@@ -55,10 +119,17 @@ IR_BRIGHT       = 0xef1c
 IR_WBAL_UP      = 0xef0f   # nowość: więcej CW
 IR_WBAL_DOWN    = 0xef13   # nowość: więcej WW
 
+# nazwy kodów do statystyk opóźnień: 0xef00 -> "red"
+IR_NAMES = {v: k[3:].lower() for k, v in dict(globals()).items()
+            if k.startswith("IR_") and isinstance(v, int)}
+
 # --- Presety jasności (w %) ---
 PRESET_LEVELS = [10, 25, 50, 75, 100]
-preset_index = len(PRESET_LEVELS) - 1  # start 100%
-brightness_level = PRESET_LEVELS[preset_index]
+brightness_level = PRESET_LEVELS[-1]   # start 100%
+BRIGHT_MIN = PRESET_LEVELS[0]          # niżej rejestr jasności (gamma 2.2) daje już 0
+BRIGHT_RAMP_S = 0.25                   # rampa przy krótkim naciśnięciu (preset)
+BRIGHT_HOLD_RAMP_S = 0.12              # rampa na powtórzenie trzymanego klawisza (~ odstęp NEC)
+BRIGHT_HOLD_MAX_STEP = 8               # max % na powtórzenie (przyspieszenie)
 
 # --- ENV dla dart-caller (opcjonalnie .env) ---
 EMAIL = os.getenv("AUTODARTS_EMAIL", "")
@@ -66,254 +137,701 @@ PASSWORD = os.getenv("AUTODARTS_PASSWORD", "")
 BOARD_ID = os.getenv("AUTODARTS_BOARD_ID", "")
 MEDIA_PATH = os.getenv("MEDIA_PATH", "")
 MEDIA_PATH_SHARED = os.getenv("MEDIA_PATH_SHARED", "")
+# skąd zdarzenia: ws = WebSocket darts-callera (-HP 8079, DC_WS_URL), a stdout
+# tylko gdy ws niepołączony; stdout = wyłącznie parsowanie logu
+DC_INGEST = os.getenv("DC_INGEST", "ws")
+DC_LINE_MAX = 1 << 20   # dłuższa linia stdout darts-callera jest pomijana
+# reguły zdarzenie -> strefa -> efekt (brak pliku = wbudowane); kill -HUP przeładowuje
+RULES_FILE = os.getenv("DC_RULES_FILE",
+                       os.path.join(os.path.dirname(os.path.abspath(__file__)), "dc_rules.ini"))
 
 # ========= INICJALIZACJA =========
-strip = PixelStrip(
-    LED_COUNT, LED_PIN, LED_FREQ_HZ, LED_DMA, LED_INVERT,
-    255, LED_CHANNEL, strip_type=STRIP_TYPE
-)
-strip.begin()
+class StripOut:
+    """Pasek fizyczny: wycinek [start, end) klatki i jego kanał (API PixelStrip)."""
+
+    __slots__ = ("cfg", "strip", "start", "end", "brightness", "dirty")
+
+    def __init__(self, cfg, start, strip):
+        self.cfg = cfg
+        self.strip = strip
+        self.start = start
+        self.end = start + cfg.count
+        self.brightness = 255   # wartość w rejestrze jasności (po limicie mocy i level)
+        self.dirty = False      # bufor biblioteki różni się od tego, co świeci
+
+# LED_BACKEND=fake -> FakeStrip (bez sprzętu, do benchmarków: led_bench.py)
+_strips = open_strips([(c.count, c.pin, c.invert, 255, c.channel, strip_type(c.strip_type))
+                       for c in STRIPS], PWM_FREQ_HZ, PWM_DMA)
+outputs = [StripOut(*a) for a in zip(STRIPS, STRIP_STARTS, _strips)]
+strip = outputs[0].strip   # pasek tablicy (benchmarki, replay)
+STRIP_SPANS = {o.cfg.name: (o.start, o.end) for o in outputs}
+# budżet prądu zasilacza (LED_POWER_LIMIT_MA, mA na kanał: led_power.py)
+power = PowerLimiter(LED_TOTAL,
+                     spans=[(o.start, o.end, o.cfg.whites) for o in outputs])
 
 state_lock = threading.Lock()
-effect_queue: "Queue[dict]" = Queue()
 running = True
 led_enabled = True
 current_effect = "idle"
-# --- dc_idle: wątek i flaga stopu
-dc_idle_thread = None
-dc_idle_stop = threading.Event()
-
-
-# Bufor klatki (biblioteka nie zwraca bieżących kolorów)
-current_frame = [(0,0,0)] * LED_COUNT
+# --- dc_idle: stały producent w slocie "idle", włączany flagą dc_idle_on
+dc_idle_on = False
+dc_then_idle_job = None   # animacja w slocie "dart", która sama przejdzie w idle
+
+
+# Bufor klatki (biblioteka nie zwraca bieżących kolorów) — złożenie wszystkich stref.
+# Wszystkie klatki to FrameBuffer: piksel = int w formacie Color() (0xRRGGBB).
+current_frame = FrameBuffer(LED_COUNT)
+wire_frame = FrameBuffer(LED_COUNT)   # current_frame po korekcji (color) = to, co idzie na pasek
+
+# ========= STREFY (kompozytor) =========
+class Zone:
+    """Nazwany zakres paska z własną warstwą (indeksy bezwzględne, pełna długość).
+       Producenci piszą tylko do swojej warstwy; na pasek składa je pętla renderująca."""
+
+    def __init__(self, name, start, end, overlay=False):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.overlay = overlay
+        self.layer = FrameBuffer(LED_COUNT)
+        self.visible = not overlay   # nakładka zasłania bazę dopiero gdy coś narysuje
+
+# main = efekty 1..22 (baza: snake może sięgać dalej i jest widoczny na 23..28,
+# dopóki strefa dart nic nie wyświetla); dart = segment dart-callera 23..28;
+# kolejne paski (ring) = strefa na cały pasek, sterowana tylko regułami
+ZONES = {
+    "main": Zone("main", 0, ACTIVE_COUNT_NON_SNAKE),
+    "dart": Zone("dart", DART_START, DART_END, overlay=True),
+}
+STRIP_ZONES = [cfg.name for cfg in STRIPS[1:]]
+for _name in STRIP_ZONES:
+    ZONES[_name] = Zone(_name, *STRIP_SPANS[_name], overlay=True)
+
+def compose_frame():
+    """Składa warstwy stref w current_frame."""
+    current_frame.copy_from(ZONES["main"].layer)
+    for z in ZONES.values():
+        if z.overlay and z.visible:
+            current_frame.copy_from(z.layer, z.start, z.end)
+
+# --- commit różnicowy: co już siedzi w buforze biblioteki i czy trzeba show()
+# 0xFFFFFFFF nie występuje w klatkach (W=0) -> pierwszy commit zapisze wszystko
+pushed_frame = FrameBuffer(LED_COUNT, fill=0xFFFFFFFF)
+commit_lock = threading.RLock()
+commit_stats = {"shows": 0, "shows_skipped": 0, "px_written": 0, "px_skipped": 0}
 
 # uchwyty
 ir_dev = None
 dc_proc = None
+dc_ws_conn = None
+dc_ws_live = threading.Event()   # ws połączony -> stdout tylko do logu
 
 # ========= BALANS BIELI (WW↔CW) =========
 WHITE_BALANCE = 0.5   # 0.0 = 100% WW, 1.0 = 100% CW
 WHITE_STEP = 0.1
 dart_mode = "idle"      # tryb segmentu 23..28: 'green','yellow','gameshot','bull_cw','off',...
-prev_dart_mode = None  # <— NOWE: zapamiętany tryb sprzed Takeout
 
-def whites_from_balance(brightness=255):
-    """Zwraca (WW, CW) wg WHITE_BALANCE i jasności 0..255."""
-    ww = int((1.0 - WHITE_BALANCE) * brightness)
-    cw = int(WHITE_BALANCE * brightness)
-    return ww, cw
+# Biel wg balansu: na nieparzystych bajt W = poziom 0..255; na WW/CW rozkłada ją
+# dopiero commit (tablice miksu w color) — zmiana balansu nie przerysowuje
+# warstw ani klatek z cache. WW/CW wpisane wprost (R/B) zostają bez zmian.
+color = ColorStage(GAMMA_RGB, GAMMA_WHITE, WHITE_BALANCE)
+
+def balanced_white(level=255):
+    return level << 24   # W: nie koliduje z R/G/B pisanymi przez efekty
 
 def white_balance_up():
     global WHITE_BALANCE
     WHITE_BALANCE = min(1.0, round(WHITE_BALANCE + WHITE_STEP, 2))
-    print(f"[WBAL] -> {WHITE_BALANCE:.2f}")
-    refresh_whites_after_balance()
+    log.info("[WBAL] -> %.2f", WHITE_BALANCE)
+    post("wbal")   # warstwy przelicza pętla renderująca
 
 def white_balance_down():
     global WHITE_BALANCE
     WHITE_BALANCE = max(0.0, round(WHITE_BALANCE - WHITE_STEP, 2))
-    print(f"[WBAL] -> {WHITE_BALANCE:.2f}")
-    refresh_whites_after_balance()
+    log.info("[WBAL] -> %.2f", WHITE_BALANCE)
+    post("wbal")
 
 def refresh_whites_after_balance():
-    """Odświeża miejsca, gdzie używamy WW+CW:
-       - efekty 1..22, jeśli aktywne to 'ww_cw_odd' lub 'all_max'
-       - segment dart-caller 23..28 w trybach 'yellow' i 'gameshot'
+    """Nowe tablice miksu WW/CW (pętla renderująca); efekty 1..22 z bielą wg
+       balansu nie są uruchamiane ponownie — commit sam pokaże nowy miks.
+       Segment dart-caller 23..28 w trybach 'yellow' i 'gameshot' dostaje biel na odd.
     """
-    # 1) Efekty 1..22
-    if current_effect in ("ww_cw_odd", "alternate_white", "all_max"):
-        # wykonaj ponownie bieżący efekt (korzysta z WHITE_BALANCE)
-        func = EFFECTS.get(current_effect)
-        if func:
-            try:
-                func()
-                strip.show()
-            except Exception as e:
-                print(f"[WBAL] refresh effects error: {e}")
-
-    # 2) Segment dart-caller 23..28
+    color.set_balance(WHITE_BALANCE)
     if dart_mode in ("yellow", "gameshot"):
-        ww, cw = whites_from_balance(255)
-        set_range_odd_whites(ww, cw)
+        set_range_odd_balanced(255)
+    renderer.request_frame()
 
 # ========= HELPERY OGÓLNE =========
-def pct_to_brightness(pct: int) -> int:
-    pct = max(0, min(100, pct))
-    gamma = 2.2
-    return int((pct / 100) ** gamma * 255)
+# % -> rejestr jasności (gamma 2.2), co 0.1% (rampy podają ułamki procentów)
+_BRIGHT_LUT = bytes(int((i / 1000) ** 2.2 * 255) for i in range(1001))
+
+def pct_to_brightness(pct) -> int:
+    return _BRIGHT_LUT[int(max(0, min(100, pct)) * 10)]
 
 def apply_brightness(show=True):
-    strip.setBrightness(pct_to_brightness(brightness_level))
-    if show:
-        strip.show()
+    # setBrightness wykona wątek renderujący; piksele bez zmian, ale jasność trzeba wysłać
+    global brightness_now
+    renderer.cancel("brightness")   # bez rampy: od razu poziom docelowy
+    brightness_now = brightness_level
+    renderer.request_frame(brightness=pct_to_brightness(brightness_level), force=show)
+
+# --- rampy jasności: producent slotu "brightness" zmienia tylko rejestr
+# setBrightness (i show()); warstwy i piksele zostają — koszt nie rośnie z paskiem
+brightness_now = None   # % aktualnie w rejestrze (kolejna rampa startuje stąd)
+
+def brightness_ramp(target, seconds):
+    """Producent: płynnie (w skali %, więc wg gammy) od brightness_now do target."""
+    global brightness_now
+    start = target if brightness_now is None else brightness_now
+    n = frames_for(seconds)
+    for i in range(1, n + 1):
+        brightness_now = start + (target - start) * i / n
+        renderer.set_brightness(pct_to_brightness(brightness_now))
+        yield
+
+def set_brightness_level(pct, seconds=BRIGHT_RAMP_S):
+    """Nowy poziom jasności [%] z rampą w pętli; nowa rampa przejmuje bieżącą."""
+    global brightness_level
+    brightness_level = max(BRIGHT_MIN, min(100, pct))
+    post("brightness", (brightness_level, seconds))
+
+def commit_frame(show=True, force=False):
+    """Składa strefy, koryguje (color: gamma + miks bieli) i wypycha na paski
+       (tylko wątek renderujący). setPixelColor tylko dla pikseli innych niż ostatnio wysłane,
+       show() tylko na paskach, których bufor biblioteki faktycznie się zmienił
+       (force=True wymusza show wszystkich). Jasność: żądana (renderer.brightness) obcięta
+       budżetem prądu (power) — limit działa rejestrem, bez przeliczania pikseli."""
+    with commit_lock:
+        compose_frame()
+        for out in outputs:   # balans/krzywa white tylko na paskach z bielą
+            if out.cfg.whites:
+                color.apply(current_frame, wire_frame, out.start, out.end)
+            else:
+                color.apply_rgb(current_frame, wire_frame, out.start, out.end)
+        written = 0
+        cur, old = wire_frame.px, pushed_frame.px
+        if cur != old:   # porównanie całych tablic w C
+            for out in outputs:
+                idx = changed(cur, old, out.start, out.end)   # wektorowo / blokami
+                if not idx:
+                    continue   # ten pasek bez zmian
+                set_px, s = out.strip.setPixelColor, out.start
+                for i in idx:
+                    set_px(i - s, cur[i])   # int w formacie Color()
+                written += len(idx)
+                out.dirty = True
+            old[:] = cur
+        commit_stats["px_written"] += written
+        commit_stats["px_skipped"] += LED_TOTAL - written
+        if written or power.load is None:
+            power.measure(wire_frame)
+        want = 255 if renderer.brightness is None else renderer.brightness
+        applied = power.limit(want)
+        for out in outputs:
+            b = int(applied * out.cfg.level)
+            if b != out.brightness:
+                out.strip.setBrightness(b)
+                out.brightness = b
+                out.dirty = True
+        power.account(applied, applied < want)
+        if not show:
+            return
+        shown = []   # urządzenia już wyrenderowane (ws2811_t: oba kanały naraz)
+        for out in outputs:
+            if out.dirty or force:
+                if out.strip.device not in shown:
+                    out.strip.show()
+                    shown.append(out.strip.device)
+                out.dirty = False
+        if shown:
+            commit_stats["shows"] += 1
+        else:
+            commit_stats["shows_skipped"] += 1
 
-def set_led_raw(i, r, g, b):
-    strip.setPixelColor(i, Color(r, g, b))
+def commit_report():
+    s = commit_stats
+    return (f"show: {s['shows']} (pominięte {s['shows_skipped']}), "
+            f"piksele: {s['px_written']} (pominięte {s['px_skipped']})")
 
-def draw_frame(frame, show=True):
-    for i, (r, g, b) in enumerate(frame):
-        set_led_raw(i, r, g, b)
-        current_frame[i] = (r, g, b)
+def zone_changed(zone, show=True):
+    """Oznacz warstwę jako widoczną; show=True -> poproś pętlę o klatkę."""
+    ZONES[zone].visible = True
     if show:
-        strip.show()
+        renderer.request_frame()
+
+def draw_frame(frame, show=True, zone="main"):
+    """Wczytaj klatkę (FrameBuffer lub lista krotek) do warstwy strefy."""
+    with commit_lock:
+        ZONES[zone].layer.load(frame)
+        zone_changed(zone, show)
 
 def clear_all_28():
-    draw_frame([(0,0,0)] * LED_COUNT, show=True)
+    with commit_lock:
+        for z in ZONES.values():
+            z.layer.fill(BLACK)
+    renderer.request_frame()
 
-def mask_frame(frame, n):
-    f = frame[:]
-    for i in range(n, len(f)):
-        f[i] = (0,0,0)
+def frame_fill_even_odd(mode: str, rgb_even=(0,0,0), rgb_odd=(0,0,0)):
+    out = FrameBuffer(LED_COUNT)
+    if mode == 'even':
+        out.fill_even(pack(*rgb_even))
+    elif mode == 'odd':
+        out.fill_odd(pack(*rgb_odd))
+    else:
+        out.fill(pack(*rgb_even))
+    return out
+
+def crossfade_to_frame(target_frame, duration=0.5, zone="main"):
+    """Producent: przejście z bieżącej warstwy strefy do target_frame w czasie duration.
+       Całe przejście liczone z góry (Crossfade), krok = wpisanie do warstwy."""
+    steps = frames_for(duration) if duration > 0 else 1
+    layer = ZONES[zone].layer
+    fade = Crossfade(layer, target_frame, steps)
+    for s in range(steps):
+        fade.apply(s, layer)
+        zone_changed(zone, show=False)
+        yield
+
+# ========= PĘTLA RENDERUJĄCA =========
+# Animacje są producentami klatek (generatorami): każdy `yield` = jedna klatka.
+# `yield k` (k > 1) = "nie wołaj mnie przez k klatek" — gdy wszyscy producenci
+# śpią, pętla nie budzi się co okres (zero pracy na klatkach bez zmian).
+# Producent rysuje z show=False, a jedyne show() na klatkę robi pętla.
+def frames_for(seconds):
+    """Ile klatek pętli trwa `seconds` (min. 1)."""
+    return max(1, round(seconds * RENDER_FPS))
+
+def hold(seconds):
+    """Producent: odczekaj `seconds` (w klatkach pętli, bez time.sleep)."""
+    yield frames_for(seconds)
+
+class _Producer:
+    __slots__ = ("gen", "done", "trace", "wake")
+
+    def __init__(self, gen, trace=None):
+        self.gen = gen
+        self.done = threading.Event()
+        self.trace = trace   # zdarzenie, które go uruchomiło (do pierwszej klatki)
+        self.wake = None     # nr klatki następnego wywołania (None = najbliższa)
+
+class RenderLoop:
+    """Jedna pętla ze stałym FPS i deadline'ami z time.monotonic() (bez dryfu).
+       Gdy pętla nie nadąża, producenci są przesuwani o zaległe klatki,
+       a na pasek idzie tylko ostatnia (klatki pośrednie są gubione).
+       Jedyny właściciel show()/setPixelColor/setBrightness pasków — inne wątki
+       tylko zmieniają warstwy stref i proszą o klatkę (request_frame)."""
+
+    def __init__(self, fps=RENDER_FPS):
+        self.fps = fps
+        self.period = 1.0 / fps
+        self.cond = threading.Condition()
+        self.producers = {}    # slot -> _Producer
+        self.retired = []      # podmienione/anulowane, do zamknięcia w wątku pętli
+        self.alive = True
+        self.thread = None
+        self.pending = False           # ktoś zmienił warstwę i chce klatkę
+        self.pending_force = False
+        self.pending_brightness = None
+        self.pending_traces = []       # zdarzenia czekające na swoją klatkę
+        self.brightness = None         # żądana jasność paska (rejestr ustawia commit)
+        self.commands = {}             # typ -> Command (szyna komend; ostatnia wygrywa)
+        self.cmd_stats = {"posted": 0, "coalesced": 0}
+        self.frame_no = 0              # zegar pętli w klatkach (także przespanych)
+        # pomiary
+        self.frames = 0
+        self.dropped = 0
+        self.slept = 0              # klatki bez ticku (wszyscy producenci śpią)
+        self.errors = 0             # ticki przerwane wyjątkiem (commit/show)
+        self.cpu_s = 0.0            # CPU wątku pętli w tickach [s]
+        self.frame_time = 0.0       # EWMA czasu renderu klatki [s]
+        self.frame_time_max = 0.0
+        self.jitter = 0.0           # EWMA spóźnienia względem deadline [s]
+        self.jitter_max = 0.0
+
+    def submit(self, slot, gen):
+        """Podmień producenta w slocie; zwraca Event ustawiany po jego zakończeniu."""
+        p = _Producer(gen, current_trace())
+        with self.cond:
+            old = self.producers.get(slot)
+            if old:
+                self.retired.append(old)
+            self.producers[slot] = p
+            self.cond.notify()
+        return p.done
+
+    def cancel(self, slot, wait=None):
+        """Przerwij producenta w slocie (opcjonalnie poczekaj aż pętla go zamknie)."""
+        with self.cond:
+            p = self.producers.pop(slot, None)
+            if p is None:
+                return
+            self.retired.append(p)
+            self.cond.notify()
+        if wait:
+            p.done.wait(wait)
+
+    def detach(self, slot):
+        """Zdejmij producenta ze slotu BEZ zamykania (pauza); wraca przez attach()."""
+        with self.cond:
+            return self.producers.pop(slot, None)
+
+    def attach(self, slot, p):
+        """Wznów producenta z detach() w slocie (obecny jest zamykany)."""
+        p.wake = None   # od najbliższej klatki, bez nadrabiania pauzy
+        with self.cond:
+            old = self.producers.get(slot)
+            if old is not None and old is not p:
+                self.retired.append(old)
+            self.producers[slot] = p
+            self.cond.notify()
+
+    def discard(self, p):
+        """Zamknij odłożonego (detach) producenta, którego nikt nie wznowi."""
+        if p is None:
+            return
+        with self.cond:
+            self.retired.append(p)
+            self.cond.notify()
+
+    def wake(self, slot):
+        """Zawołaj producenta w najbliższej klatce, nawet jeśli śpi (yield k)."""
+        with self.cond:
+            p = self.producers.get(slot)
+            if p is not None:
+                p.wake = None
+                self.cond.notify()
+
+    def job(self, slot):
+        """Event zakończenia producenta aktualnie w slocie (albo None)."""
+        with self.cond:
+            p = self.producers.get(slot)
+            return p.done if p else None
+
+    def run_blocking(self, slot, gen):
+        self.submit(slot, gen).wait()
+
+    def post(self, cmd):
+        """Komenda do wykonania w wątku pętli na początku najbliższego ticku;
+           kolejna komenda tego samego typu przed tickiem zastępuje poprzednią."""
+        with self.cond:
+            if cmd.kind in self.commands:
+                self.cmd_stats["coalesced"] += 1
+            self.commands[cmd.kind] = cmd
+            self.cmd_stats["posted"] += 1
+            self.cond.notify()
+
+    def _run_commands(self, commands):
+        # OFF/ON i jasność przed balansem i zmianą efektu
+        for cmd in sorted(commands.values(), key=lambda c: COMMAND_PRIORITY.get(c.kind, 9)):
+            with traced(cmd.trace):
+                try:
+                    COMMANDS[cmd.kind](cmd.arg)
+                except Exception as e:
+                    log_render.exception("komenda %s failed: %s", cmd.kind, e)
+            if cmd.trace is not None:
+                cmd.trace.mark("applied")
+
+    def set_brightness(self, value):
+        """Tylko w wątku pętli (producent): nowa jasność; commit tej klatki
+           ustawi rejestr (z limitem mocy) i zrobi show()."""
+        self.brightness = value
+
+    def request_frame(self, brightness=None, force=False):
+        """Poproś o klatkę (najpóźniej w następnym ticku); opcjonalnie nowa jasność."""
+        trace = current_trace()
+        with self.cond:
+            self.pending = True
+            self.pending_force = self.pending_force or force
+            if brightness is not None:
+                self.pending_brightness = brightness
+            if trace is not None:
+                self.pending_traces.append(trace)
+            self.cond.notify()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        with self.cond:
+            self.alive = False
+            self.cond.notify_all()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def _finished(self, slot, p):
+        with self.cond:
+            if self.producers.get(slot) is p:
+                del self.producers[slot]
+        p.done.set()
+
+    def tick(self, ticks=1):
+        """Przesuń producentów o `ticks` klatek i wyślij jedną klatkę na pasek."""
+        with commit_lock:
+            with self.cond:
+                commands, self.commands = self.commands, {}
+            if commands:   # przed producentami: nowy producent rusza w tej klatce
+                self._run_commands(commands)
+            with self.cond:
+                retired, self.retired = self.retired, []
+                items = list(self.producers.items())
+                force, brightness = self.pending_force, self.pending_brightness
+                self.pending = self.pending_force = False
+                self.pending_brightness = None
+                traces, self.pending_traces = self.pending_traces, []
+            if brightness is not None:
+                self.set_brightness(brightness)
+            for p in retired:
+                p.gen.close()
+                p.done.set()
+            self.frame_no += ticks
+            now = self.frame_no
+            for slot, p in items:
+                if p.wake is None:
+                    p.wake = now
+                if p.wake > now:
+                    continue   # śpi (yield k)
+                if p.trace is not None:
+                    traces.append(p.trace)
+                    p.trace = None
+                try:
+                    while p.wake <= now:   # zaległe klatki nadrabiane bez show()
+                        p.wake += next(p.gen) or 1
+                except StopIteration:
+                    self._finished(slot, p)
+                except Exception as e:
+                    log_render.exception("%s failed: %s", slot, e)
+                    self._finished(slot, p)
+            commit_frame(force=force)
+            for t in traces:
+                t.mark_shown()   # po show(): ta klatka niesie zmianę ze zdarzenia
+
+    def _idle_frames(self):
+        """Ile najbliższych klatek nikt nie potrzebuje (pod self.cond)."""
+        if self.retired or self.pending or self.commands:
+            return 0
+        wake = min(p.wake if p.wake is not None else 0 for p in self.producers.values())
+        return max(0, wake - self.frame_no - 1)
+
+    def run(self):
+        next_deadline = time.monotonic()
+        try:
+            while self.alive and running:
+                with self.cond:
+                    if not (self.producers or self.retired or self.pending or self.commands):
+                        self.cond.wait()   # nic nie animuje -> śpimy do submit()/request_frame()
+                        next_deadline = time.monotonic()
+                        continue
+                    idle = self._idle_frames()
+                    if idle:
+                        # producenci śpią: czekaj do klatki pierwszego z nich
+                        # (submit()/request_frame() budzą wcześniej)
+                        wait = next_deadline + idle * self.period - time.monotonic()
+                        if wait > 0:
+                            self.cond.wait(wait)
+                now = time.monotonic()
+                if idle and now > next_deadline:
+                    # przespane klatki to nie zgubione: przesuń zegar pętli bez ticku
+                    skip = min(idle, int((now - next_deadline) // self.period))
+                    next_deadline += skip * self.period
+                    self.frame_no += skip
+                    self.slept += skip
+                if now < next_deadline:
+                    time.sleep(next_deadline - now)
+                    now = time.monotonic()
+                late = now - next_deadline
+                ticks = 1 + int(late // self.period)
+                jitter = late - (ticks - 1) * self.period
+                next_deadline += ticks * self.period
+
+                t0, c0 = time.monotonic(), time.thread_time()
+                try:
+                    self.tick(ticks)
+                except Exception as e:
+                    # np. RuntimeError z ws2811_render: jedyny wątek piszący na
+                    # paski musi żyć; brudne paski pójdą w kolejnej klatce
+                    self.errors += 1
+                    log_render.exception("klatka %d failed: %s", self.frame_no, e)
+                    self.request_frame()
+                dt = time.monotonic() - t0
+                self.cpu_s += time.thread_time() - c0
+
+                self.frames += 1
+                self.dropped += ticks - 1
+                self.frame_time += (dt - self.frame_time) * 0.05
+                self.frame_time_max = max(self.frame_time_max, dt)
+                self.jitter += (jitter - self.jitter) * 0.05
+                self.jitter_max = max(self.jitter_max, jitter)
+        finally:
+            with self.cond:
+                left = list(self.producers.values()) + self.retired
+                self.producers.clear()
+                self.retired = []
+            for p in left:
+                p.done.set()
+
+    def reset_stats(self):
+        self.frames = self.dropped = self.slept = self.errors = 0
+        self.cpu_s = 0.0
+        self.frame_time = self.frame_time_max = 0.0
+        self.jitter = self.jitter_max = 0.0
+
+    def report(self):
+        return (f"{self.fps} FPS: klatki {self.frames}, zgubione {self.dropped}, przespane {self.slept}, "
+                f"błędy {self.errors}, "
+                f"czas klatki {self.frame_time*1000:.2f} ms (max {self.frame_time_max*1000:.2f}), "
+                f"jitter {self.jitter*1000:.2f} ms (max {self.jitter_max*1000:.2f}), "
+                f"komendy {self.cmd_stats['posted']} (scalone {self.cmd_stats['coalesced']})")
+
+renderer = RenderLoop()
+
+# ========= PREVIEW (CROSS-FADE) + CACHE KLATEK =========
+def _odd_whites_frame():
+    f = FrameBuffer(LED_COUNT)
+    f.fill_odd(balanced_white())   # WW+CW wg balansu (miks przy commicie)
     return f
 
-def draw_frame_22(frame, show=True):
-    draw_frame(mask_frame(frame, ACTIVE_COUNT_NON_SNAKE), show=show)
+def _all_max_frame():
+    # ALL MAX: parzyste biel RGB; nieparzyste WW+CW wg balansu
+    f = frame_fill_even_odd('even', (255,255,255))
+    f.fill_odd(balanced_white())
+    return f
 
-def frame_fill_even_odd(mode: str, rgb_even=(0,0,0), rgb_odd=(0,0,0)):
-    out = []
-    for i in range(LED_COUNT):
-        if mode == 'even':
-            out.append(rgb_even if i % 2 == 0 else (0,0,0))
-        elif mode == 'odd':
-            out.append(rgb_odd if i % 2 == 1 else (0,0,0))
-        else:
-            out.append(rgb_even)
-    return out
+FRAME_BUILDERS = {
+    "red":  lambda: frame_fill_even_odd('even', (255,0,0)),
+    "green":lambda: frame_fill_even_odd('even', (0,255,0)),
+    "blue": lambda: frame_fill_even_odd('even', (0,0,255)),
+    "orange": lambda: frame_fill_even_odd('even', (255,70,0)),
+    "lgr": lambda: frame_fill_even_odd('even', (0,75,255)),
+    "lbl": lambda: frame_fill_even_odd('even', (0,255,0)),
+    # whites na nieparzystych: WW=R, CW=B
+    "ww":   lambda: frame_fill_even_odd('odd',  rgb_odd=(255,0,0)),
+    "cw":   lambda: frame_fill_even_odd('odd',  rgb_odd=(0,0,255)),
+    "ww_cw_odd": _odd_whites_frame,
+    "ww_cw_blue": _odd_whites_frame,
+    "alternate_white": _odd_whites_frame,
+    "all_max": _all_max_frame,
+    "snake_combo": lambda: FrameBuffer(LED_COUNT),
+    "idle": lambda: FrameBuffer(LED_COUNT),
+}
+
+# (nazwa, ACTIVE_COUNT_NON_SNAKE) -> gotowa (zamaskowana) klatka; balans bieli
+# jest poza klatkami (miks przy commicie). Klatki z cache są tylko do odczytu.
+frame_cache = {}
+
+def cached_frame(name: str):
+    """Klatka docelowa efektu z cache (budowana tylko przy pierwszym użyciu)."""
+    key = (name, ACTIVE_COUNT_NON_SNAKE)
+    f = frame_cache.get(key)
+    if f is None:
+        build = FRAME_BUILDERS.get(name)
+        f = build() if build else FrameBuffer(LED_COUNT)
+        if name not in ("snake_combo", "snake"):
+            f.mask(ACTIVE_COUNT_NON_SNAKE)
+        frame_cache[key] = f
+    return f
 
-def lerp(a, b, t): return int(a + (b - a) * t)
-
-def crossfade_to_frame(target_frame, duration=0.5, steps=24):
-    if steps <= 0 or duration <= 0:
-        draw_frame(target_frame, show=True); return
-    delay = duration / steps
-    start = current_frame[:]
-    for s in range(1, steps+1):
-        t = s / steps
-        blended = [(lerp(sr,tr,t), lerp(sg,tg,t), lerp(sb,tb,t))
-                   for (sr,sg,sb),(tr,tg,tb) in zip(start, target_frame)]
-        draw_frame(blended, show=True)
-        time.sleep(delay)
-
-# ========= PREVIEW (CROSS-FADE) =========
 def preview_frame(name: str):
     """Podgląd do cross-fade. Snake = pełne 28; reszta maskowana do 22."""
-    ww, cw = whites_from_balance(255)
-    PREVIEWS = {
-        "red":  frame_fill_even_odd('even', (255,0,0)),
-        "green":frame_fill_even_odd('even', (0,255,0)),
-        "blue": frame_fill_even_odd('even', (0,0,255)),
-        "orange": frame_fill_even_odd('even', (255,70,0)),
-        "lgr": frame_fill_even_odd('even', (0,75,255)),
-        "lbl": frame_fill_even_odd('even', (0,255,0)),
-        # whites na nieparzystych: WW=R, CW=B
-        "ww":   frame_fill_even_odd('odd',  rgb_odd=(255,0,0)),
-        "cw":   frame_fill_even_odd('odd',  rgb_odd=(0,0,255)),
-        "ww_cw_odd": frame_fill_even_odd('odd', rgb_odd=(ww,0,cw)),
-        "ww_cw_blue": frame_fill_even_odd('odd', rgb_odd=(ww,0,cw)),
-        "alternate_white": frame_fill_even_odd('odd', rgb_odd=(ww,0,cw)),
-        # ALL MAX: parzyste biel RGB; nieparzyste WW+CW wg balansu
-        "all_max": [(255,255,255) if (i % 2 == 0) else (ww,0,cw) for i in range(LED_COUNT)],
-        "snake_combo": [(0,0,0)] * LED_COUNT,
-        "idle": [(0,0,0)] * LED_COUNT,
-    }
-    f = PREVIEWS.get(name, [(0,0,0)] * LED_COUNT)
-    if name not in ("snake_combo", "snake"):
-        f = mask_frame(f, ACTIVE_COUNT_NON_SNAKE)
-    return f
+    return cached_frame(name)
 
 # ========= EFEKTY =========
+# animowane efekty to producenci klatek dla RenderLoop (yield = klatka)
+# (piszą wprost do warstwy strefy — bez kopii klatki na krok)
 def snake_rgb_all(delay=0.03):
-    for i in range(0, LED_COUNT, 2):
-        frame = current_frame[:]; frame[i] = (0,255,0)
-        draw_frame(frame); time.sleep(delay)
-    for i in range(LED_COUNT - 2, -1, -2):
-        frame = current_frame[:]; frame[i] = (255,0,0)
-        draw_frame(frame); time.sleep(delay)
-    for i in range(0, LED_COUNT, 2):
-        frame = current_frame[:]; frame[i] = (0,0,255)
-        draw_frame(frame); time.sleep(delay)
-    for i in range(LED_COUNT - 2, -1, -2):
-        frame = current_frame[:]; frame[i] = (255,255,255)
-        draw_frame(frame); time.sleep(delay)
+    layer = ZONES["main"].layer
+    for i in range(0, BOARD_COUNT, 2):
+        layer[i] = pack(0,255,0); zone_changed("main", show=False); yield from hold(delay)
+    for i in range(BOARD_COUNT - 2, -1, -2):
+        layer[i] = pack(255,0,0); zone_changed("main", show=False); yield from hold(delay)
+    for i in range(0, BOARD_COUNT, 2):
+        layer[i] = pack(0,0,255); zone_changed("main", show=False); yield from hold(delay)
+    for i in range(BOARD_COUNT - 2, -1, -2):
+        layer[i] = pack(255,255,255); zone_changed("main", show=False); yield from hold(delay)
         
-def snake_rgb_range(start=DART_START, end=DART_END, delay=0.03, cycles=1, final="clear"):
+def snake_rgb_range(start=DART_START, end=DART_END, delay=0.03, cycles=1, final="clear", zone="dart",
+                    trail="dot"):
     """
     Snake RGB tylko w [start, end). final: "clear" | "restore" | None
       - clear    -> gasi zakres po animacji
       - restore  -> ustawia: even=RGB biel, odd=WW+CW wg balansu
       - None     -> zostawia ostatnią klatkę
+    trail: "dot"  -> jedna kropka po wszystkich pikselach (reszta zgaszona)
+           "even" -> tylko even, kolejny kolor zamalowuje poprzedni
+                     (jak snake_rgb z dawnego dart-caller-listener.py)
     """
-    def _wipe_range(buf):
-        for j in range(start, min(end, LED_COUNT)):
-            buf[j] = (0, 0, 0)
+    layer = ZONES[zone].layer
+    if trail == "even":
+        fwd = range(start + (start & 1), end, 2)
+
+        def _step(i, c):
+            layer[i] = c
+            zone_changed(zone, show=False)
+    else:
+        fwd = range(start, end)
+
+        def _step(i, c):
+            layer.fill(BLACK, start, end)
+            layer[i] = c
+            zone_changed(zone, show=False)
+    back = fwd[::-1]
 
     for _ in range(cycles):
-        for i in range(start, end):
-            frame = current_frame[:]; _wipe_range(frame)
-            frame[i] = (0, 255, 0);   draw_frame(frame); time.sleep(delay)
-        for i in range(end - 1, start - 1, -1):
-            frame = current_frame[:]; _wipe_range(frame)
-            frame[i] = (255, 0, 0);  draw_frame(frame); time.sleep(delay)
-        for i in range(start, end):
-            frame = current_frame[:]; _wipe_range(frame)
-            frame[i] = (0, 0, 255);  draw_frame(frame); time.sleep(delay)
-        for i in range(end - 1, start - 1, -1):
-            frame = current_frame[:]; _wipe_range(frame)
-            frame[i] = (255, 255, 255); draw_frame(frame); time.sleep(delay)
+        for i in fwd:
+            _step(i, pack(0, 255, 0));  yield from hold(delay)
+        for i in back:
+            _step(i, pack(255, 0, 0));  yield from hold(delay)
+        for i in fwd:
+            _step(i, pack(0, 0, 255));  yield from hold(delay)
+        for i in back:
+            _step(i, pack(255, 255, 255)); yield from hold(delay)
 
     # --- finalizacja ---
     if final == "clear":
-        clear_range(start, end)
+        clear_range(start, end, zone=zone)
     elif final == "restore":
-        clear_range(start, end)
-        set_range_even_rgb(255, 255, 255, start, end)
-        ww, cw = whites_from_balance(255)
-        set_range_odd_whites(ww, cw, start, end)
+        clear_range(start, end, zone=zone)
+        set_range_even_rgb(255, 255, 255, start, end, show=False, zone=zone)
+        set_range_odd_balanced(255, start, end, show=False, zone=zone)
 
 
 
-def only_cw_scaled_limit(raw_0_255, limit=22):
-    frame = [(0,0,0)] * LED_COUNT
-    upto = min(limit, LED_COUNT)
-    for i in range(upto):
-        if i % 2 == 1:
-            frame[i] = (0, 0, raw_0_255)  # CW=B
-    draw_frame(frame)
+def only_cw_scaled_limit(raw_0_255, limit=ACTIVE_COUNT_NON_SNAKE, show=True):
+    layer = ZONES["main"].layer
+    with commit_lock:
+        layer.fill(BLACK)
+        layer.fill_odd(pack(0, 0, raw_0_255), 0, limit)  # CW=B
+        zone_changed("main", show)
 
-def fade_cw_cycles(limit=22):
+def fade_cw_cycles(limit=ACTIVE_COUNT_NON_SNAKE):
     steps_up = 50; steps_down = 30
     inc = max(1, 256 // steps_up)
     dec = max(1, 256 // steps_down)
     for b in range(0, 256, inc):
-        only_cw_scaled_limit(b, limit=limit); time.sleep(0.02)
+        only_cw_scaled_limit(b, limit=limit, show=False); yield from hold(0.02)
     for b in range(255, -1, -dec):
-        only_cw_scaled_limit(b, limit=limit); time.sleep(0.04)
+        only_cw_scaled_limit(b, limit=limit, show=False); yield from hold(0.04)
     for b in range(0, 129, inc):
-        only_cw_scaled_limit(b, limit=limit); time.sleep(0.02)
-
-# statyczne (maskowane do 22)
-def effect_red_even():        draw_frame_22(frame_fill_even_odd('even', (255,0,0)))
-def effect_green_even():      draw_frame_22(frame_fill_even_odd('even', (0,255,0)))
-def effect_blue_even():       draw_frame_22(frame_fill_even_odd('even', (0,0,255)))
-def effect_orange_even():     draw_frame_22(frame_fill_even_odd('even', (255,70,0)))
-def effect_lgr_even():        draw_frame_22(frame_fill_even_odd('even', (0,75,255)))
-def effect_lbl_even():        draw_frame_22(frame_fill_even_odd('even', (0,255,0)))
-def effect_ww_odd():          draw_frame_22(frame_fill_even_odd('odd',  rgb_odd=(255,0,0)))   # WW=R
-def effect_cw_odd():          draw_frame_22(frame_fill_even_odd('odd',  rgb_odd=(0,0,255)))   # CW=B
-def effect_ww_cw_odd():
-    ww, cw = whites_from_balance(255)
-    draw_frame_22(frame_fill_even_odd('odd',  rgb_odd=(ww,0,cw)))
-
-def effect_all_max():
-    ww, cw = whites_from_balance(255)
-    frame = [(255,255,255) if (i % 2 == 0) else (ww,0,cw) for i in range(LED_COUNT)]
-    draw_frame_22(frame)
+        only_cw_scaled_limit(b, limit=limit, show=False); yield from hold(0.02)
+
+# statyczne (maskowane do 22) — gotowe klatki z frame_cache
+def effect_red_even():        draw_frame(cached_frame("red"))
+def effect_green_even():      draw_frame(cached_frame("green"))
+def effect_blue_even():       draw_frame(cached_frame("blue"))
+def effect_orange_even():     draw_frame(cached_frame("orange"))
+def effect_lgr_even():        draw_frame(cached_frame("lgr"))
+def effect_lbl_even():        draw_frame(cached_frame("lbl"))
+def effect_ww_odd():          draw_frame(cached_frame("ww"))   # WW=R
+def effect_cw_odd():          draw_frame(cached_frame("cw"))   # CW=B
+def effect_ww_cw_odd():       draw_frame(cached_frame("ww_cw_odd"))
+def effect_all_max():         draw_frame(cached_frame("all_max"))
 
 def effect_snake_combo():
-    snake_rgb_all()
-    snake_rgb_all()
-    fade_cw_cycles(limit=22)
-    only_cw_scaled_limit(128, limit=22)
+    yield from snake_rgb_all()
+    yield from snake_rgb_all()
+    yield from fade_cw_cycles()
+    only_cw_scaled_limit(128, show=False)
+    yield
 
 EFFECTS = {
     "red": effect_red_even,
@@ -332,41 +850,67 @@ EFFECTS = {
     "idle": lambda: None,
 }
 
-# ========= WORKER EFEKTÓW =========
-def effects_worker():
-    global current_effect
-    while running:
-        try:
-            job = effect_queue.get(timeout=0.1)
-        except Empty:
-            continue
-        name = job.get("name")
-        do_fade = job.get("fade", True)
-        fade_time = job.get("fade_time", 0.5)
-        with state_lock:
-            current_effect = name
-            enabled = led_enabled
-            func = EFFECTS.get(name)
-        if not enabled:
-            clear_all_28()
-            continue
-        try:
-            if do_fade:
-                target = preview_frame(name)
-                crossfade_to_frame(target, duration=fade_time, steps=max(1, int(fade_time*48)))
-            if func:
-                func()
-                strip.show()
-        except Exception as e:
-            print(f"[effects] {name} failed: {e}")
+# ========= PRODUCENT EFEKTÓW (slot "main") =========
+def effect_producer(name, fade=True, fade_time=0.5):
+    """Producent: cross-fade od tego, co aktualnie świeci, potem efekt.
+       Każdy yield to punkt przerwania — nowy set_effect() podmienia producenta
+       i pętla zamyka stary przed następną klatką."""
+    if fade:
+        yield from crossfade_to_frame(preview_frame(name), duration=fade_time)
+    func = EFFECTS.get(name)
+    res = func() if func else None
+    if inspect.isgenerator(res):   # animowany; statyczny już narysował
+        yield from res
 
 def set_effect(name, fade=True, fade_time=0.5):
-    try:
-        while True:
-            effect_queue.get_nowait()
-    except Empty:
-        pass
-    effect_queue.put({"name": name, "fade": fade, "fade_time": fade_time})
+    """Przełącz efekt od razu (przerywa bieżącą animację/cross-fade)."""
+    global current_effect
+    with state_lock:
+        current_effect = name
+        enabled = led_enabled
+    if not enabled:
+        renderer.cancel("main")
+        clear_all_28()
+        return None
+    return renderer.submit("main", effect_producer(name, fade, fade_time))
+
+# ========= SZYNA KOMEND (wejście -> pętla renderująca) =========
+# Handlery IR nie dotykają warstw ani paska: wysyłają komendę, którą wykonuje
+# wątek pętli na początku ticku. Komendy z jednego ticku są scalane (ostatnia
+# danego typu) i wykonywane wg priorytetu — OFF i jasność przed efektem.
+class Command(NamedTuple):
+    kind: str            # "power" | "brightness" | "wbal" | "effect"
+    arg: object = None
+    trace: object = None
+
+COMMAND_PRIORITY = {"power": 0, "brightness": 1, "wbal": 2, "effect": 3}
+
+def post(kind, arg=None):
+    """Wyślij komendę do pętli renderującej (nie czeka na jej wykonanie)."""
+    trace = current_trace()
+    renderer.post(Command(kind, arg, trace))
+    if trace is not None:
+        trace.mark("queued")
+
+def _cmd_power(on):
+    enable_leds(on)
+    if on:
+        set_effect("snake_combo", fade=True, fade_time=0.6)
+
+def _cmd_brightness(arg):
+    level, seconds = arg
+    renderer.submit("brightness", brightness_ramp(level, seconds))
+
+def _cmd_wbal(_):
+    refresh_whites_after_balance()
+
+# typ komendy -> handler (wątek pętli renderującej, pod commit_lock)
+COMMANDS = {
+    "power": _cmd_power,
+    "brightness": _cmd_brightness,
+    "wbal": _cmd_wbal,
+    "effect": lambda name: set_effect(name),
+}
 
 # ========= IR LISTENER =========
 def enable_leds(enable: bool):
@@ -374,10 +918,11 @@ def enable_leds(enable: bool):
     with state_lock:
         led_enabled = enable
     if enable:
-        print("LED: ON")
+        log.info("LED: ON")
         apply_brightness(show=False)
     else:
-        print("LED: OFF")
+        log.info("LED: OFF")
+        renderer.cancel("main")   # animacja nie nadpisze zgaszonych warstw
         clear_all_28()
 
 def clear_and_flag():
@@ -386,61 +931,78 @@ def clear_and_flag():
         with open("/tmp/led_disable.flag", "w") as f:
             f.write("off")
     except Exception as e:
-        print(f"Nie mogę zapisać flagi: {e}")
+        log.warning("Nie mogę zapisać flagi: %s", e)
+
+# kod pilota -> akcja: tylko komendy dla pętli (post), nic na pasek wprost
+IR_ACTIONS = {
+    IR_ON:  lambda: post("power", True),
+    IR_OFF: lambda: post("power", False),
+    IR_RED: lambda: (log_ir.info("Czerwone parzyste (1..22)"), post("effect", "red")),
+    IR_GREEN: lambda: (log_ir.info("Zielone parzyste (1..22)"), post("effect", "green")),
+    IR_BLUE: lambda: (log_ir.info("Niebieskie parzyste (1..22)"), post("effect", "blue")),
+    IR_WW: lambda: (log_ir.info("WW nieparzyste (1..22)"), post("effect", "ww")),
+    IR_WW_CW_BLUE: lambda: (log_ir.info("WW+CW (1..22)"), post("effect", "ww_cw_odd")),
+    IR_CW: lambda: (log_ir.info("CW nieparzyste (1..22)"), post("effect", "cw")),
+    IR_ORANGE: lambda: (log_ir.info("Pomarańczowy even (1..22)"), post("effect", "orange")),
+    IR_LGR: lambda: (log_ir.info("LGR even (1..22)"), post("effect", "lgr")),
+    IR_LBL: lambda: (log_ir.info("LBL even (1..22)"), post("effect", "lbl")),
+    # balans bieli:
+    IR_WBAL_UP:   lambda: white_balance_up(),
+    IR_WBAL_DOWN: lambda: white_balance_down(),
+}
+
+# klawisze do trzymania: akcja dostaje numer powtórzenia (0 = naciśnięcie)
+IR_HOLD_ACTIONS = {
+    IR_DIM:    lambda repeat: brightness_step(-1, repeat),
+    IR_BRIGHT: lambda repeat: brightness_step(+1, repeat),
+}
+
+IR_DEBOUNCE = 0.4      # pozostałe klawisze: powtórzenia w tym oknie są pomijane
+IR_REPEAT_GAP = 0.25   # ten sam kod szybciej = klawisz trzymany (NEC powtarza co ~110 ms)
+_ir_last = {"time": 0.0, "code": None, "repeat": 0}
 
-def ir_listener(device_path='/dev/input/event0'):
+def ir_handle(event):
+    """Jedno zdarzenie evdev; akcję wywołuje tylko kod skanu (EV_MSC/MSC_SCAN)."""
+    if event.type != ecodes.EV_MSC or event.code != ecodes.MSC_SCAN:
+        return
+    sc = event.value
+    now = time.monotonic()
+    hold = IR_HOLD_ACTIONS.get(sc)
+    if hold is not None:
+        # bez debounce: każde powtórzenie to krok (coraz większy)
+        held = sc == _ir_last["code"] and (now - _ir_last["time"]) < IR_REPEAT_GAP
+        repeat = _ir_last["repeat"] + 1 if held else 0
+        _ir_last.update(time=now, code=sc, repeat=repeat)
+        action = lambda: hold(repeat)
+    else:
+        if (now - _ir_last["time"]) < IR_DEBOUNCE and sc == _ir_last["code"]:
+            return
+        _ir_last.update(time=now, code=sc, repeat=0)
+        action = IR_ACTIONS.get(sc)
+    log_ir.debug("Kod: %s", hex(sc))
+    if not action:
+        log_ir.info("Nieznany kod %s — brak akcji", hex(sc))
+        return
+    # t0 = znacznik jądra (przyjście kodu), nie moment odczytu
+    trace = Trace(f"ir:{IR_NAMES.get(sc, hex(sc))}", monotonic_from_wall(event.timestamp()))
+    trace.mark("classified")
+    with traced(trace):
+        action()   # "queued" w post(), "applied" gdy wykona ją pętla
+
+async def ir_task(device_path='/dev/input/event0'):
+    """Pilot w pętli I/O: czeka na deskryptor evdev (bez timeoutu poll)."""
     global ir_dev
     ir_dev = InputDevice(device_path)
-    print(f"Nasłuchiwanie IR na {device_path}...")
+    log_ir.info("Nasłuchiwanie IR na %s...", device_path)
     try:
         ir_dev.grab()
     except Exception:
         pass
-
-    poller = select.poll()
-    poller.register(ir_dev.fileno(), select.POLLIN)
-
-    debounce_time = 0.4
-    last_time = 0.0
-    last_code = None
-
-    code_to_action = {
-        IR_ON:  lambda: (enable_leds(True), set_effect("snake_combo", fade=True, fade_time=0.6)),
-        IR_OFF: lambda: (enable_leds(False), clear_all_28()),
-        IR_RED: lambda: (print("Czerwone parzyste (1..22)"), set_effect("red")),
-        IR_GREEN: lambda: (print("Zielone parzyste (1..22)"), set_effect("green")),
-        IR_BLUE: lambda: (print("Niebieskie parzyste (1..22)"), set_effect("blue")),
-        IR_WW: lambda: (print("WW nieparzyste (1..22)"), set_effect("ww")),
-        IR_WW_CW_BLUE: lambda: (print("WW+CW (1..22)"), set_effect("ww_cw_odd")),
-        IR_CW: lambda: (print("CW nieparzyste (1..22)"), set_effect("cw")),
-        IR_ORANGE: lambda: (print("Pomarańczowy even (1..22)"), set_effect("orange")),
-        IR_LGR: lambda: (print("LGR even (1..22)"), set_effect("lgr")),
-        IR_LBL: lambda: (print("LBL even (1..22)"), set_effect("lbl")),
-        IR_DIM: lambda: preset_prev_action(),
-        IR_BRIGHT: lambda: preset_next_action(),
-        # balans bieli:
-        IR_WBAL_UP:   lambda: white_balance_up(),
-        IR_WBAL_DOWN: lambda: white_balance_down(),
-    }
-
     try:
-        while running:
-            events = poller.poll(200)
-            if not events:
-                continue
-            for _ in events:
-                for event in ir_dev.read():
-                    if event.type == ecodes.EV_MSC and event.code == ecodes.MSC_SCAN:
-                        sc = event.value
-                        now = time.time()
-                        if (now - last_time) < debounce_time and sc == last_code:
-                            continue
-                        last_time, last_code = now, sc
-                        print(f"[IR] Kod: {hex(sc)}")
-                        action = code_to_action.get(sc)
-                        action() if action else print("Nieznany kod — brak akcji")
+        async for event in ir_dev.async_read_loop():
+            ir_handle(event)
     except OSError:
-        pass
+        pass   # urządzenie zniknęło
     finally:
         try:
             ir_dev.ungrab()
@@ -453,179 +1015,543 @@ def ir_listener(device_path='/dev/input/event0'):
         ir_dev = None
 
 # ========= PRESETY JASNOŚCI =========
-def preset_prev_action():
-    global preset_index, brightness_level
-    if preset_index > 0:
-        preset_index -= 1
-    brightness_level = PRESET_LEVELS[preset_index]
-    print(f"Preset jasności: {brightness_level}%")
-    apply_brightness()
-
-def preset_next_action():
-    global preset_index, brightness_level
-    if preset_index < len(PRESET_LEVELS) - 1:
-        preset_index += 1
-    brightness_level = PRESET_LEVELS[preset_index]
-    print(f"Preset jasności: {brightness_level}%")
-    apply_brightness()
+def brightness_step(direction, repeat=0):
+    """IR_DIM/IR_BRIGHT: naciśnięcie -> sąsiedni preset (rampa BRIGHT_RAMP_S);
+       trzymany klawisz -> płynnie dalej, krok rośnie z kolejnymi powtórzeniami."""
+    if repeat == 0:
+        if direction > 0:
+            level = next((p for p in PRESET_LEVELS if p > brightness_level), PRESET_LEVELS[-1])
+        else:
+            level = next((p for p in reversed(PRESET_LEVELS) if p < brightness_level), PRESET_LEVELS[0])
+        set_brightness_level(level)
+        log.info("Preset jasności: %d%%", brightness_level)
+    else:
+        step = min(BRIGHT_HOLD_MAX_STEP, 1 + repeat // 2)
+        set_brightness_level(brightness_level + direction * step, BRIGHT_HOLD_RAMP_S)
+        log.debug("Jasność: %d%% (powtórzenie %d)", brightness_level, repeat)
 
 # ========= DART-CALLER: zakres 23..28 =========
-def set_range_even_rgb(r, g, b, start=DART_START, end=DART_END):
-    for i in range(start, min(end, LED_COUNT)):
-        if i % 2 == 0:
-            strip.setPixelColor(i, Color(r, g, b))
-    strip.show()
-
-def set_range_odd_whites(ww, cw, start=DART_START, end=DART_END):
-    for i in range(start, min(end, LED_COUNT)):
-        if i % 2 == 1:
-            strip.setPixelColor(i, Color(ww, 0, cw))  # WW=R, CW=B
-    strip.show()
-
-def clear_range(start, end):
-    for i in range(start, min(end, LED_COUNT)):
-        strip.setPixelColor(i, Color(0,0,0))
-    strip.show
+# Helpery zakresu piszą do warstwy strefy (domyślnie "dart"); na pasek trafia
+# to w najbliższej klatce pętli renderującej.
+def set_range_even_rgb(r, g, b, start=DART_START, end=DART_END, show=True, zone="dart"):
+    with commit_lock:
+        ZONES[zone].layer.fill_even(pack(r, g, b), start, end)
+        zone_changed(zone, show)
+
+def set_range_odd_whites(ww, cw, start=DART_START, end=DART_END, show=True, zone="dart"):
+    with commit_lock:
+        ZONES[zone].layer.fill_odd(pack(ww, 0, cw), start, end)  # WW=R, CW=B
+        zone_changed(zone, show)
+
+def set_range_odd_balanced(level=255, start=DART_START, end=DART_END, show=True, zone="dart"):
+    """Odd w [start,end): biel wg balansu (WW/CW rozkłada commit)."""
+    with commit_lock:
+        ZONES[zone].layer.fill_odd(balanced_white(level), start, end)
+        zone_changed(zone, show)
+
+def clear_range(start, end, show=False, zone="dart"):
+    """Zgaś [start,end); domyślnie bez prośby o klatkę — pójdzie z kolejną."""
+    with commit_lock:
+        ZONES[zone].layer.fill(BLACK, start, end)
+        zone_changed(zone, show)
     
-def set_range_even_rgb_scaled(r, g, b, scale, start=DART_START, end=DART_END):
-    """Ustaw even w [start,end) kolorem (r,g,b)*scale (0..1)."""
-    rs = int(r * scale); gs = int(g * scale); bs = int(b * scale)
-    for i in range(start, min(end, LED_COUNT)):
-        if i % 2 == 0:
-            strip.setPixelColor(i, Color(rs, gs, bs))
-    strip.show()
-
-def clear_range_odd(start=DART_START, end=DART_END):
+def clear_range_odd(start=DART_START, end=DART_END, show=True, zone="dart"):
     """Zgaś odd w [start,end) — na idle nie świecimy whites."""
-    for i in range(start, min(end, LED_COUNT)):
-        if i % 2 == 1:
-            strip.setPixelColor(i, Color(0,0,0))
-    strip.show()
+    with commit_lock:
+        ZONES[zone].layer.fill_odd(BLACK, start, end)
+        zone_changed(zone, show)
  
-def restore_dart_mode_after_takeout():
-    global dart_mode, prev_dart_mode
-    # domyślnie wyczyść segment
-    clear_range(DART_START, DART_END)
-
-    if prev_dart_mode == "gameshot":
-        dc_gameshot()
-    elif prev_dart_mode == "green":
-        dc_green()
-    elif prev_dart_mode == "busted":
-        dc_busted()
-    elif prev_dart_mode == "idle" or prev_dart_mode == "off" or prev_dart_mode is None:
-        # wróć do „ciszy” – Twój wybór: idle w segmencie lub zostaw ciemno
-        dc_idle_start()   # albo po prostu zostaw clear_range(...)
-    else:
-        # nieznany – nic nie rób (zostanie wyczyszczone)
-        pass
-
-    prev_dart_mode = None
-
-
-def _dc_idle_worker(delay=0.02, steps=80):
+# --- migawki stref na czas Takeout (stos na strefę: Takeout w Takeout)
+class SegmentSnapshot:
+    """Stan strefy sprzed Takeout: tryb, piksele warstwy i wstrzymany
+       (detach) producent — po Takeout wraca dokładnie tam, gdzie był.
+       mode/idle/idle_job mają znaczenie tylko dla strefy dart."""
+
+    __slots__ = ("mode", "px", "visible", "producer", "idle", "idle_job", "stale")
+
+    def __init__(self, mode, px, visible, producer, idle, idle_job):
+        self.mode = mode
+        self.px = px
+        self.visible = visible
+        self.producer = producer
+        self.idle = idle            # czy idle był włączony
+        self.idle_job = idle_job
+        self.stale = False   # w trakcie Takeout przyszedł nowszy stan strefy
+
+ZONE_STACK_MAX = 4
+zone_stacks = {name: [] for name in ZONES}   # tylko wątek konsumenta zdarzeń (dc_event_worker)
+
+def zone_push_snapshot(zone="dart"):
+    """Takeout Started: odłóż bieżący stan strefy (animacja zostaje wstrzymana)."""
+    global dc_then_idle_job
+    z = ZONES[zone]
+    dart = zone == "dart"
+    with commit_lock:   # nie w środku ticku: warstwa zgodna ze stanem producenta
+        snap = SegmentSnapshot(dart_mode, z.layer.px[z.start:z.end], z.visible,
+                               renderer.detach(zone), dart and dc_idle_on,
+                               dc_then_idle_job if dart else None)
+        if dart:
+            dc_idle_set(False)
+    if dart:
+        dc_then_idle_job = None
+    stack = zone_stacks[zone]
+    stack.append(snap)
+    if len(stack) > ZONE_STACK_MAX:
+        renderer.discard(stack.pop(0).producer)
+
+def zone_snapshots_stale(zone="dart"):
+    """Nowy stan strefy w trakcie Takeout: po Takeout zostaje on, nie migawka."""
+    for snap in zone_stacks[zone]:
+        snap.stale = True
+
+def zone_restore_after_takeout(zone="dart"):
+    """Takeout Finished: przywróć migawkę jednym commitem (bez ponownego
+       odtwarzania animacji); bez migawki — idle strefy jak dawniej."""
+    global dart_mode, dc_then_idle_job
+    z = ZONES[zone]
+    stack = zone_stacks[zone]
+    if not stack:
+        clear_range(z.start, z.end, zone=zone)
+        zone_idle_start(zone)
+        return
+    snap = stack.pop()
+    if snap.stale:
+        renderer.discard(snap.producer)
+        return
+    with commit_lock:
+        z.layer.px[z.start:z.end] = snap.px
+        z.visible = snap.visible
+        if snap.producer is not None:
+            renderer.attach(zone, snap.producer)
+        else:
+            renderer.cancel(zone)
+        if zone == "dart":
+            dart_mode = snap.mode
+            dc_then_idle_job = snap.idle_job
+            dc_idle_set(snap.idle)
+        renderer.request_frame()
+
+
+# --- dc_idle: 'oddychanie' na even w 23..28, wypalone raz w tabeli (LUT)
+IDLE_PALETTE = [
+    (255,   0,   0),  # red
+    (255, 255,   0),  # yellow
+    (0,   255,   0),  # green
+    (0,   255, 255),  # cyan
+    (0,     0, 255),  # blue
+    (255,   0, 255),  # magenta
+    (255, 255, 255),  # white
+]
+IDLE_STEPS = 80       # kroków na przejście kolor -> kolor
+IDLE_DELAY = 0.02     # czas kroku [s]
+# klatka idzie na pasek dopiero, gdy po skali jasności (jak ws2811: c*(B+1)>>8)
+# różni się od ostatnio wysłanej o >= IDLE_MIN_DELTA poziomów (1 = tylko
+# kroki niewidoczne na wyjściu są pomijane); najdłużej IDLE_MAX_HOLD kroków
+IDLE_MIN_DELTA = int(os.getenv("LED_IDLE_MIN_DELTA", "1"))
+IDLE_MAX_HOLD = 25
+
+idle_stats = {"steps": 0, "frames": 0, "cpu_s": 0.0}
+_idle_lut = None
+_idle_schedules = {}   # (jasność, IDLE_MIN_DELTA) -> plan na każde przejście
+
+def idle_lut():
+    """[przejście][krok] -> kolor even (Color int); ta sama krzywa co dawniej:
+       lerp koloru c0 -> c1 i oddech (1 - cos)/2 z offsetem 0.12."""
+    global _idle_lut
+    if _idle_lut is None:
+        import math
+        lut = []
+        n = len(IDLE_PALETTE)
+        for idx in range(n):
+            c0, c1 = IDLE_PALETTE[idx], IDLE_PALETTE[(idx + 1) % n]
+            row = []
+            for t in range(IDLE_STEPS):
+                p = t / (IDLE_STEPS - 1)
+                scale = 0.12 + 0.88 * (1.0 - math.cos(2 * math.pi * p)) * 0.5
+                row.append(pack(*(int(int(a + (b - a) * p) * scale) for a, b in zip(c0, c1))))
+            lut.append(row)
+        _idle_lut = lut
+    return _idle_lut
+
+def idle_schedule(brightness):
+    """LUT -> [(kolor, ile kroków trzymać)] na przejście, dla jasności paska."""
+    key = (brightness, IDLE_MIN_DELTA)
+    plan = _idle_schedules.get(key)
+    if plan is None:
+        if len(_idle_schedules) >= 8:   # jasność płynna (rampy): trzymaj kilka ostatnich
+            _idle_schedules.clear()
+        plan = []
+        for row in idle_lut():
+            out, last = [], None
+            for c in row:
+                wire = [color.rgb[(c >> sh) & 0xFF] * (brightness + 1) >> 8 for sh in (16, 8, 0)]
+                if (last is not None and out[-1][1] < IDLE_MAX_HOLD
+                        and max(abs(x - y) for x, y in zip(wire, last)) < IDLE_MIN_DELTA):
+                    out[-1][1] += 1
+                    continue
+                out.append([c, 1])
+                last = wire
+            plan.append([tuple(x) for x in out])
+        _idle_schedules[key] = plan
+    return plan
+
+IDLE_PARKED = 1_000_000   # klatek snu wyłączonego idle (budzi go dc_idle_set)
+
+def dc_idle_producer():
     """
-    'Oddychanie' na even w 23..28:
-    - jasność sinusoidalna
-    - miks przejść między kolorami z palety
+    Producent 'oddychania' na even w 23..28 (odtwarzanie LUT), żyje cały czas:
+    - dc_idle_on=False -> nie rysuje i śpi (zaparkowany), wznawia w tym samym
+      miejscu cyklu
+    - kroki niewidoczne przy bieżącej jasności są przeskakiwane (yield k),
+      więc przy ciemnym pasku / płaskich fragmentach pętla śpi
     - odd (whites) wyłączone na czas idle
+    - plan zależy od jasności: sprawdzana przed każdym krokiem; po zmianie
+      plan przeliczany i odtwarzanie wraca do tego samego kroku LUT
     """
-    import math
-    palette = [
-        (255,   0,   0),  # red
-        (255, 255,   0),  # yellow
-        (0,   255,   0),  # green
-        (0,   255, 255),  # cyan
-        (0,     0, 255),  # blue
-        (255,   0, 255),  # magenta
-        (255, 255, 255),  # white
-    ]
-    # upewnij się, że odd są zgaszone
-    clear_range_odd(DART_START, DART_END)
-
-    idx = 0
-    while not dc_idle_stop.is_set():
-        c0 = palette[idx % len(palette)]
-        c1 = palette[(idx + 1) % len(palette)]
-        # przejście c0 -> c1 z oddechem
-        for t in range(steps):
-            if dc_idle_stop.is_set():
-                break
-            # progres przejścia koloru
-            p = t / (steps - 1)
-            r = int(c0[0] + (c1[0] - c0[0]) * p)
-            g = int(c0[1] + (c1[1] - c0[1]) * p)
-            b = int(c0[2] + (c1[2] - c0[2]) * p)
-            # oddech (0..1): (1 - cos)/2
-            breath = (1.0 - math.cos(2 * math.pi * p)) * 0.5
-            # lekki offset, żeby nie gasło do zera:
-            scale = 0.12 + 0.88 * breath
-            set_range_even_rgb_scaled(r, g, b, scale, DART_START, DART_END)
-            time.sleep(delay)
-        idx += 1
+    layer = ZONES["dart"].layer
+    step = frames_for(IDLE_DELAY)
+    paused = True
+    idx = t = 0   # przejście i krok LUT w nim
+    while True:
+        bright = pct_to_brightness(brightness_level)
+        plan = idle_schedule(bright)
+        pos = 0
+        for c, n in plan[idx]:
+            if pos + n <= t:   # już zagrane (wznowienie po zmianie jasności)
+                pos += n
+                continue
+            while not dc_idle_on:
+                paused = True
+                yield IDLE_PARKED
+            if pct_to_brightness(brightness_level) != bright:
+                break   # nowy plan od kroku t
+            if paused:
+                # upewnij się, że odd są zgaszone
+                clear_range_odd(DART_START, DART_END, show=False)
+                paused = False
+            t0 = time.thread_time()
+            layer.fill_even(c, DART_START, DART_END)
+            zone_changed("dart", show=False)
+            hold = pos + n - t
+            pos = t = pos + n
+            idle_stats["steps"] += hold
+            idle_stats["frames"] += 1
+            idle_stats["cpu_s"] += time.thread_time() - t0
+            yield hold * step
+        else:
+            idx = (idx + 1) % len(plan)
+            t = 0
+
+def idle_report():
+    s = idle_stats
+    saved = 1 - s["frames"] / s["steps"] if s["steps"] else 0.0
+    return (f"kroki LUT {s['steps']}, klatki {s['frames']} (pominięte {saved:.0%}), "
+            f"CPU producenta {s['cpu_s']*1000:.1f} ms; pętla renderująca CPU {renderer.cpu_s:.2f} s")
+
+def dc_idle_set(on):
+    """Włącz/wyłącz rysowanie idle (flaga; bez wątków, bez czekania).
+       Wyłączony producent nie narysuje już nic w kolejnym ticku — zmiany
+       warstwy pod commit_lock po dc_idle_set(False) są bezpieczne."""
+    global dc_idle_on
+    if on and renderer.job("idle") is None:
+        renderer.submit("idle", dc_idle_producer())   # raz, przy pierwszym użyciu
+    if on != dc_idle_on:
+        dc_idle_on = on
+        if on:
+            renderer.wake("idle")   # nie czekaj, aż prześpi IDLE_PARKED
 
 def dc_idle_start():
-    """Uruchom dc_idle w tle (jeśli już nie działa)."""
-    global dc_idle_thread, dart_mode
+    """Idle w segmencie (jeśli animacja sama w nie przejdzie — nie przerywaj jej)."""
+    global dart_mode
     dart_mode = "idle"
-    if dc_idle_thread and dc_idle_thread.is_alive():
+    if dc_then_idle_job is not None and renderer.job("dart") is dc_then_idle_job:
         return
-    dc_idle_stop.clear()
-    dc_idle_thread = threading.Thread(target=_dc_idle_worker, daemon=True)
-    dc_idle_thread.start()
+    renderer.cancel("dart")   # animacje segmentu ustępują idle
+    dc_idle_set(True)
 
 def dc_idle_stop_fn(clear_segment=False):
-    """Zatrzymaj dc_idle (opcjonalnie zgaś 23..28)."""
-    global dc_idle_thread
-    dc_idle_stop.set()
-    if dc_idle_thread:
-        try:
-            dc_idle_thread.join(timeout=0.5)
-        except Exception:
-            pass
-    dc_idle_thread = None
+    """Zatrzymaj idle i animację segmentu: gameshot, bull (opcjonalnie zgaś 23..28).
+       Bez czekania: producent znika ze slotu / przestaje rysować od razu,
+       a rysowanie pod commit_lock i tak nie trafi w środek ticku."""
+    global dc_then_idle_job
+    dc_idle_set(False)
+    renderer.cancel("dart")
+    dc_then_idle_job = None
     if clear_segment:
         clear_range(DART_START, DART_END)
 
-
-def dc_green():
-    global dart_mode
-    dart_mode = "green"
-    clear_range(DART_START, DART_END)
-    set_range_even_rgb(0, 255, 0)
-
-def dc_yellow_takeout():
-    global dart_mode, prev_dart_mode
-    prev_dart_mode = dart_mode          # <— zapamiętaj
-    dart_mode = "yellow"
-    clear_range(DART_START, DART_END)
-    set_range_even_rgb(255, 255, 0)
+# --- idle pozostałych stref (ring): 'oddychanie' kolejnymi kolorami na even,
+# jak dawny dart-caller-listener.py; producent w slocie strefy, bez końca
+ZONE_IDLE_COLORS = [(0, 255, 0), (0, 0, 255)]
+ZONE_IDLE_RAMP_S = 0.5   # rozjaśnianie (i tyle samo przyciemnianie) jednego koloru
+ZONE_IDLE_STEP_S = 0.04  # czas kroku rampy [s]
+_zone_idle_plan = None
+
+def zone_idle_plan():
+    """Cały cykl jako [(kolor, ile kroków trzymać)], liczony raz; powtórzone
+       kolory (szczyt/zero między kolorami) sklejone w jeden dłuższy krok."""
+    global _zone_idle_plan
+    if _zone_idle_plan is None:
+        n = max(1, round(ZONE_IDLE_RAMP_S / ZONE_IDLE_STEP_S))
+        ramp = [i / n for i in range(n + 1)]
+        ramp += ramp[-2::-1]
+        plan = []
+        for r, g, b in ZONE_IDLE_COLORS:
+            for k in ramp:
+                c = pack(int(r * k), int(g * k), int(b * k))
+                if plan and plan[-1][0] == c:
+                    plan[-1][1] += 1
+                else:
+                    plan.append([c, 1])
+        if len(plan) > 1 and plan[0][0] == plan[-1][0]:   # cykl: sklej koniec z początkiem
+            plan[0][1] += plan.pop()[1]
+        _zone_idle_plan = [tuple(x) for x in plan]
+    return _zone_idle_plan
+
+def zone_idle_producer(zone):
+    """Odtwarzanie planu na even strefy; między krokami pętla śpi (yield k),
+       zamiast liczyć kolor w każdej klatce."""
+    z = ZONES[zone]
+    step = frames_for(ZONE_IDLE_STEP_S)
+    clear_range_odd(z.start, z.end, show=False, zone=zone)
+    while True:
+        for c, n in zone_idle_plan():
+            with commit_lock:
+                z.layer.fill_even(c, z.start, z.end)
+                zone_changed(zone, show=False)
+            yield n * step
+
+def zone_idle_start(zone):
+    """Idle strefy: dart -> dc_idle (LUT), pozostałe -> zone_idle_producer."""
+    if zone == "dart":
+        dc_idle_start()
+    else:
+        renderer.submit(zone, zone_idle_producer(zone))
 
 
-def dc_busted():
+def _set_mode(zone, mode):
     global dart_mode
-    dart_mode = "busted"
-    clear_range(DART_START, DART_END)
-    set_range_even_rgb(255, 0, 0)
-
-def dc_gameshot():
+    if zone == "dart":
+        dart_mode = mode
+
+# clear + kolor pod jednym commit_lock: pętla nie pokaże pustego segmentu pomiędzy
+def dc_solid(color, mode, zone="dart"):
+    """Stały kolor na even strefy (green / yellow / busted)."""
+    z = ZONES[zone]
+    _set_mode(zone, mode)
+    with commit_lock:
+        clear_range(z.start, z.end, zone=zone)
+        set_range_even_rgb(*color, z.start, z.end, zone=zone)
+
+def _gameshot_producer(then_idle, delay, cycles, final, zone, trail="dot"):
     global dart_mode
-    dart_mode = "gameshot"
-    snake_rgb_range(DART_START, DART_END, delay=0.03, cycles=1, final="clear")
+    z = ZONES[zone]
+    yield from snake_rgb_range(z.start, z.end, delay=delay, cycles=cycles, final=final, zone=zone,
+                               trail=trail)
+    if then_idle:
+        if zone != "dart":
+            yield from zone_idle_producer(zone)   # w tym samym slocie
+            return
+        dart_mode = "idle"
+        dc_idle_set(True)
+
+def dc_gameshot(then_idle=False, delay=0.03, cycles=1, final="clear", zone="dart", mode="gameshot",
+                trail="dot"):
+    """Snake na strefie (w tle, w pętli); then_idle -> potem włącza idle."""
+    global dc_then_idle_job
+    _set_mode(zone, mode)
+    job = renderer.submit(zone, _gameshot_producer(then_idle, delay, cycles, final, zone, trail))
+    if then_idle and zone == "dart":
+        dc_then_idle_job = job
+    return job
+
+def _bull_flashes(color=(255, 0, 0), count=6, period=0.08, zone="dart"):
+    z = ZONES[zone]
+    c = pack(*color)
+    for _ in range(count):
+        z.layer.fill(c, z.start, z.end)
+        zone_changed(zone, show=False)
+        yield from hold(period)
+        clear_range(z.start, z.end, zone=zone)
+        yield from hold(period)
+
+def _bull_producer(color, count, period, after, zone, resume=None):
+    yield from _bull_flashes(color, count, period, zone)
+    z = ZONES[zone]
+    if after == "cw":
+        # po fleszach: CW na nieparzystych (tu nie używamy balansu: to czyste CW)
+        set_range_odd_whites(0, 255, z.start, z.end, show=False, zone=zone)
+    elif resume is not None:
+        # after = restore: piksele sprzed fleszy i przerwana animacja strefy
+        px, visible, prev = resume
+        z.layer.px[z.start:z.end] = px
+        z.visible = visible
+        if prev is not None:
+            try:
+                yield from prev.gen
+            finally:
+                prev.done.set()
+            return
+    yield
+
+def dc_bull(color=(255, 0, 0), count=6, period=0.08, after="cw", zone="dart", mode="bull_cw"):
+    _set_mode(zone, mode)
+    resume = None
+    if after == "restore":
+        z = ZONES[zone]
+        with commit_lock:
+            resume = (z.layer.px[z.start:z.end], z.visible, renderer.detach(zone))
+    return renderer.submit(zone, _bull_producer(color, count, period, after, zone, resume))
+
+# ========= DART-CALLER: reguły (dc_rules) =========
+# efekt -> fabryka(strefa, **parametry z pliku) -> akcja bez argumentów;
+# zły parametr / wartość wychodzi przy wczytaniu reguł, nie przy zdarzeniu
+def _fx_solid(zone, color=(255, 255, 255), mode="solid"):
+    return lambda: dc_solid(color, mode, zone)
+
+def _fx_snake(zone, delay=0.03, cycles=1, final="clear", then="none", mode="gameshot", trail="dot"):
+    if final not in ("clear", "restore", "none"):
+        raise ValueError(f"final = {final} (clear | restore | none)")
+    if then not in ("idle", "none"):
+        raise ValueError(f"then = {then} (idle | none)")
+    if trail not in ("dot", "even"):
+        raise ValueError(f"trail = {trail} (dot | even)")
+    final = None if final == "none" else final
+    return lambda: dc_gameshot(then == "idle", delay, cycles, final, zone, mode, trail)
+
+def _fx_flash(zone, color=(255, 0, 0), count=6, period=0.08, after="cw", mode="bull_cw"):
+    if after not in ("cw", "restore", "none"):
+        raise ValueError(f"after = {after} (cw | restore | none)")
+    return lambda: dc_bull(color, count, period, after, zone, mode)
+
+def _fx_idle(zone):
+    return lambda: zone_idle_start(zone)
+
+def _fx_none(zone):
+    return lambda: None
+
+DC_EFFECTS = {
+    "solid": _fx_solid,
+    "snake": _fx_snake,
+    "flash": _fx_flash,
+    "idle": _fx_idle,
+    "none": _fx_none,
+}
 
-def dc_bull():
-    global dart_mode
-    dart_mode = "bull_cw"
-    for _ in range(6):
-        for i in range(DART_START, DART_END):
-            strip.setPixelColor(i, Color(255,0,0))
-        strip.show(); time.sleep(0.08)
-        clear_range(DART_START, DART_END); time.sleep(0.08)
-    # po fleszach: CW na nieparzystych (tu nie używamy balansu: to czyste CW)
-    set_range_odd_whites(0, 255)
-
-def dart_caller_thread():
-    global dc_proc, running
+def zone_stop(zone):
+    """policy=replace: zatrzymaj to, co strefa pokazuje, i ją wyczyść."""
+    if zone == "dart":
+        dc_idle_stop_fn(clear_segment=True)
+    else:
+        z = ZONES[zone]
+        renderer.cancel(zone)
+        clear_range(z.start, z.end, zone=zone)
+
+def build_rule(rule):
+    """dc_rules.Rule -> (akcja, nowy_stan); nowy_stan = strefa, której stan
+       zdarzenie nadpisuje (jej migawki Takeout stają się nieaktualne) albo None."""
+    zone = rule.zone
+    if zone not in ZONES:
+        raise ValueError(f"nieznana strefa (są: {', '.join(ZONES)})")
+    if rule.policy == "restore":   # migawka sprzed Takeout
+        return lambda: zone_restore_after_takeout(zone), None
+    fx = DC_EFFECTS.get(rule.effect)
+    if fx is None:
+        raise ValueError(f"nieznany efekt (są: {', '.join(DC_EFFECTS)})")
+    run = fx(zone, **rule.params)
+    if rule.policy == "snapshot":
+        def action():
+            zone_push_snapshot(zone)
+            run()
+        return action, None
+    if rule.policy == "replace":
+        def action():
+            zone_stop(zone)
+            run()
+        return action, zone
+    return run, zone   # keep
+
+# kind -> ((akcja, nowy_stan), ...) po strefach; podmieniany w całości przy przeładowaniu
+DC_ACTIONS = {}
+
+# Czytniki (stdout, WebSocket) tylko klasyfikują i wrzucają DcEvent do dc_queue;
+# akcje na segmencie wykonuje jeden konsument (dc_event_worker). Animacje są
+# producentami pętli, więc żadna akcja nie blokuje kolejnych zdarzeń.
+# Które oczekujące zdarzenia można scalić — z reguł (install_rules).
+dc_queue = dc_events.EventQueue(maxlen=64)
+
+def install_rules(rules):
+    """Skompiluj reguły; DC_ACTIONS i pary scalania kolejki podmieniane
+       jednym przypisaniem (konsument widzi starą albo nową tabelę)."""
+    global DC_ACTIONS
+    DC_ACTIONS = dc_rules.compile_rules(rules, build_rule)
+    dc_queue.supersedes = dc_rules.supersedes(rules)
+
+def load_rules(path=None):
+    """Wczytaj i zainstaluj reguły (plik albo wbudowane); zwraca źródło."""
+    rules, source = dc_rules.load_rules(path or RULES_FILE, ZONES)
+    install_rules(rules)
+    return source
+
+def reload_rules(*_):
+    """SIGHUP: przeładuj reguły bez restartu (darts-caller działa dalej).
+       Błąd w pliku -> zostają poprzednie (na starcie: wbudowane)."""
+    try:
+        source = load_rules()
+    except dc_rules.RuleError as e:
+        log_dc.error("reguły: %s — zostają poprzednie", e)
+        if not DC_ACTIONS:
+            install_rules(dc_rules.default_rules(ZONES))
+        return
+    log_dc.info("reguły: %s (%d zdarzeń)", source, len(DC_ACTIONS))
+
+reload_rules()
+
+# ========= DART-CALLER: zdarzenia =========
+def dc_submit(ev):
+    """Strona czytnika: zdarzenie do kolejki (nie czeka na LED)."""
+    trace = Trace(f"dc:{ev.kind}", ev.t0)
+    trace.mark("classified")
+    dc_queue.put(ev, trace)
+    trace.mark("queued")
+
+def dc_handle_event(ev, trace=None):
+    """Wykonaj akcje z reguł (po strefach) dla DcEvent (z pomiarem opóźnienia od ev.t0)."""
+    rules = DC_ACTIONS.get(ev.kind)
+    if not rules:   # zdarzenie bez reguły
+        return
+    trace = trace or Trace(f"dc:{ev.kind}", ev.t0)
+    with traced(trace):
+        for action, new_state in rules:
+            if new_state:
+                zone_snapshots_stale(new_state)
+            action()
+    trace.mark("applied")
+    log_dc.info("%s (%s) -> dart_mode=%s", ev.kind, ev.source, dart_mode)
+
+def dc_event_worker():
+    """Konsument dc_queue: jedyny wątek, który zmienia stan stref dart-callera."""
+    while running:
+        item = dc_queue.get()
+        if item is None:
+            continue
+        ev, trace = item
+        trace.mark("dequeued")
+        try:
+            dc_handle_event(ev, trace)
+        except Exception as e:
+            log_dc.exception("%s failed: %s", ev.kind, e)
+
+def dc_handle_line(s, t0=None):
+    """Sklasyfikuj linię darts-callera; zwraca DcEvent albo None (szum)."""
+    ev = dc_events.classify(s, t0)
+    if ev is not None:
+        dc_submit(ev)
+    return ev
+
+async def dart_caller_task():
+    """darts-caller jako proces potomny; jego stdout czyta pętla I/O."""
+    global dc_proc
     cmd = [
         "python3", "/home/raczqq/darts-caller/darts-caller.py",
         "-U", EMAIL, "-P", PASSWORD, "-B", BOARD_ID,
@@ -640,105 +1566,148 @@ def dart_caller_thread():
         "-DEB","0"
     ]
     try:
-        dc_proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        dc_proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            limit=DC_LINE_MAX)
     except Exception as e:
-        print(f"[dart-caller] nie mogę uruchomić: {e}")
+        log_dc.error("nie mogę uruchomić darts-callera: %s", e)
         return
 
-    print("[dart-caller] start")
+    log_dc.info("darts-caller start")
     try:
-        for line in dc_proc.stdout:
-            if not running:
+        while True:
+            try:
+                line = await dc_proc.stdout.readline()
+            except ValueError:   # linia > DC_LINE_MAX: pominięta
+                continue
+            if not line:
                 break
-            s = line.strip()
-            if not s: 
+            t0 = time.monotonic()   # przyjście linii = początek pomiaru opóźnienia
+            s = line.decode("utf-8", "replace").strip()
+            if not s:
                 continue
-            print("[DC]", s)
-
-            # mapowanie zdarzeń -> tylko LED 23..28
-            if re.search(r"(Matchon|Gameon|Next player)", s, re.I):
-                dc_idle_stop_fn(clear_segment=True)
-                dc_green()
-            elif re.search(r"Takeout Started", s, re.I):
-                dc_idle_stop_fn(clear_segment=True)
-                dc_yellow_takeout()
-            elif re.search(r"Takeout Finished", s, re.I):
-                restore_dart_mode_after_takeout()   # <— zamiast samego clear/idle
-            elif re.search(r"(Gameshot and match|Gameshot)", s, re.I):
-                dc_idle_stop_fn(clear_segment=True)
-                dc_gameshot()
-                clear_range(DART_START, DART_END); dart_mode = "off"
-                dc_idle_start()
-            elif re.search(r"Busted", s, re.I):
-                dc_idle_stop_fn(clear_segment=True)
-                dc_busted()
-            elif re.search(r'sound-file-key\s+"(?:bullseye|bull)"', s, re.I):
-                dc_idle_stop_fn(clear_segment=True)
-                dc_bull()
-            elif re.search(r"match ended", s, re.I):
-                dc_idle_start()
-                #clear_range(DART_START, DART_END); dart_mode = "off"
-
+            log_dc.debug("%s", s)
+            if not dc_ws_live.is_set():
+                dc_handle_line(s, t0)
     except Exception as e:
-        print(f"[dart-caller] loop err: {e}")
+        log_dc.exception("loop err: %s", e)
     finally:
-        print("[dart-caller] stop")
-        try:
-            if dc_proc and dc_proc.poll() is None:
-                dc_proc.terminate()
-                dc_proc.wait(timeout=2)
-        except Exception:
+        log_dc.info("darts-caller stop")
+        if dc_proc.returncode is None:
             try:
-                dc_proc.kill()
+                dc_proc.terminate()
+                await asyncio.wait_for(dc_proc.wait(), 2)
             except Exception:
-                pass
+                try:
+                    dc_proc.kill()
+                except Exception:
+                    pass
         dc_proc = None
 
+async def dart_caller_ws_task():
+    """Zdarzenia z WebSocketu darts-callera (JSON -> DcEvent); przy braku
+       połączenia zdarzenia bierze stdout. Ponawia połączenie co 2 s."""
+    global dc_ws_conn
+    while True:
+        try:
+            conn = await dc_ws.connect_async(dc_ws.DC_WS_URL)
+        except (OSError, ValueError, asyncio.TimeoutError, dc_ws.WsClosed):
+            await asyncio.sleep(2.0)
+            continue
+        dc_ws_conn = conn
+        dc_ws_live.set()
+        log_dc.info("ws: połączono z %s — zdarzenia z WebSocketu", dc_ws.DC_WS_URL)
+        try:
+            while True:
+                msg = await conn.recv()
+                t0 = time.monotonic()
+                if isinstance(msg, str):
+                    ev = dc_ws.decode(msg, t0)
+                    if ev is not None:
+                        dc_submit(ev)
+        except (OSError, dc_ws.WsClosed) as e:
+            log_dc.warning("ws: rozłączono (%s) — zdarzenia ze stdout", e)
+        except Exception as e:
+            log_dc.exception("ws: loop err: %s", e)
+        finally:
+            dc_ws_live.clear()
+            dc_ws_conn = None
+            conn.close()
+        await asyncio.sleep(2.0)
+
+# ========= PĘTLA I/O (asyncio) =========
+# Jedna pętla w wątku głównym czeka na wszystkie wejścia naraz: evdev pilota,
+# stdout darts-callera i WebSocket. Bez timeoutów poll — budzi ją tylko gotowy
+# deskryptor albo sygnał. Akcje tylko zgłaszają zmiany pętli renderującej
+# (wątek), zdarzenia segmentu idą przez dc_queue do dc_event_worker.
+async def io_main(device_path='/dev/input/event0'):
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    loop.add_signal_handler(signal.SIGINT, stop.set)
+    loop.add_signal_handler(signal.SIGTERM, stop.set)
+    loop.add_signal_handler(signal.SIGUSR1, dump_stats)     # kill -USR1 <pid> -> statystyki commitu/opóźnień
+    loop.add_signal_handler(signal.SIGHUP, reload_rules)    # kill -HUP <pid> -> nowe reguły z RULES_FILE
+
+    ir = asyncio.create_task(ir_task(device_path))
+    tasks = [ir, asyncio.create_task(dart_caller_task())]
+    if DC_INGEST == "ws":
+        tasks.append(asyncio.create_task(dart_caller_ws_task()))
+    stopped = asyncio.create_task(stop.wait())
+    # koniec: sygnał albo koniec IR (jak dawniej: bez pilota usługa się kończy)
+    await asyncio.wait({ir, stopped}, return_when=asyncio.FIRST_COMPLETED)
+    for t in tasks + [stopped]:
+        t.cancel()
+    await asyncio.gather(*tasks, stopped, return_exceptions=True)
+    if not ir.cancelled() and ir.exception() is not None:
+        raise ir.exception()
+
 # ========= START/STOP =========
+def dump_stats(*_):
+    log.info("[commit] %s", commit_report())
+    log.info("[render] %s", renderer.report())
+    log.info("[dc-queue] %s", dc_queue.report())
+    log.info("[idle] %s", idle_report())
+    log.info("[power] %s", power.report())
+    log.info("[log] %s", led_log.report())
+    log.info("[latency] zdarzenie -> show() (ms od przyjścia):\n%s", led_latency.stats.report())
+    try:
+        led_latency.stats.dump(LATENCY_FILE)
+        led_log.dump_ring(LOG_DUMP_FILE, "statystyki")
+    except OSError as e:
+        log.warning("zapis statystyk: %s", e)
+
 def on_exit(*_):
-    global running, ir_dev, dc_proc
-    print("Zamykanie...")
+    """Po zakończeniu pętli I/O (IR, darts-caller i WebSocket już zamknięte)."""
+    global running
+    log.info("Zamykanie...")
     running = False
-    try:
-        if ir_dev: ir_dev.close()
-    except Exception:
-        pass
-    try:
-        if dc_proc and dc_proc.poll() is None:
-            dc_proc.terminate()
-            dc_proc.wait(timeout=2)
-    except Exception:
-        try:
-            dc_proc.kill()
-        except Exception:
-            pass
+    dc_queue.close()
+    renderer.stop()   # od teraz nikt inny nie pisze na pasek — można zgasić bezpośrednio
     try:
         clear_all_28()
+        commit_frame(force=True)
     except Exception:
         pass
+    dump_stats()
+    led_log.writer.close()
 
 if __name__ == "__main__":
-    signal.signal(signal.SIGINT, on_exit)
-    signal.signal(signal.SIGTERM, on_exit)
+    led_log.install_crash_dump(LOG_DUMP_FILE)
 
-    # wątek efektów
-    worker = threading.Thread(target=effects_worker, daemon=True)
-    worker.start()
+    # pętla renderująca (stały FPS); efekty to jej producenci
+    renderer.start()
 
     # startowy stan jak po uruchomieniu: snake_combo
     apply_brightness(show=False)
     set_effect("snake_combo", fade=False)
+    for name in STRIP_ZONES:   # ring od startu oddycha (jak dawny listener)
+        zone_idle_start(name)
 
-    # wątek dart-caller
-    dc_thread = threading.Thread(target=dart_caller_thread, daemon=True)
-    dc_thread.start()
+    # konsument zdarzeń segmentu (czeka na dc_queue, bez timeoutu)
+    threading.Thread(target=dc_event_worker, name="dc-events", daemon=True).start()
 
-    # IR w wątku głównym (blokujące)
+    # IR + darts-caller (stdout, WebSocket): jedna pętla asyncio w wątku głównym
     try:
-        ir_listener('/dev/input/event0')
+        asyncio.run(io_main('/dev/input/event0'))
     finally:
         on_exit()
-        try: worker.join(timeout=1.0)
-        except Exception: pass
-        try: dc_thread.join(timeout=1.0)
-        except Exception: pass
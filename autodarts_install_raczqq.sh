@@ -12,6 +12,7 @@ sudo apt install python3-rpi.gpio -y
 sudo apt install lirc -y
 sudo apt install ir-keytable -y
 sudo pip3 install rpi_ws281x evdev -y
+sudo apt install python3-numpy -y   # opcjonalnie: szybsze przejścia LED (led_frame.py)
 sudo git clone https://github.com/lbormann/darts-caller.git -y
 cd darts-caller
 sudo pip3 install -r requirements.txt--break-system-packages -y
@@ -55,6 +56,11 @@ curl -L "$GITHUB_URL" -o $DESTINATION
 #Nadaj prawa do uruchomienia
 chmod +x "$DESTINATION"
 echo -e "${GREEN}Plik zapisano jako:${NC} $DESTINATION"
+#Moduły, z których korzysta led_ir.py (backend paska, bufor klatki)
+for MODULE in led_backend.py led_frame.py; do
+  curl -L "$(dirname "$GITHUB_URL")/$MODULE" -o "/home/$USER/$MODULE"
+  echo -e "${GREEN}Plik zapisano jako:${NC} /home/$USER/$MODULE"
+done
 echo -e "${BLUE}Pobieram Autodarts...${NC}"
 bash <(curl -sL get.autodarts.io)
 echo "Tworzenie pliku systemd: $SERVICE_PATH"
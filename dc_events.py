@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Zdarzenia darts-callera: klasyfikacja linii stdout -> DcEvent.
+
+(Zdarzenia z WebSocketu darts-callera dekoduje dc_ws.py do tych samych typów.)
+
+Jedna skompilowana alternatywa zamiast łańcucha re.search. Większość linii
+to szum, więc najpierw tani prefiltr: `in` na line.lower() dla słów
+kluczowych (C, bez silnika re) — regex widzi tylko linie z kandydatem.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+# typy zdarzeń (kolejność = priorytet, jak w dawnym łańcuchu if/elif)
+MATCHON = "matchon"
+TAKEOUT_START = "takeout_start"
+TAKEOUT_END = "takeout_end"
+GAMESHOT = "gameshot"
+BUSTED = "busted"
+BULL = "bull"
+MATCH_END = "match_end"
+
+DC_PATTERNS = [
+    (MATCHON,       r"Matchon|Gameon|Next player"),
+    (TAKEOUT_START, r"Takeout Started"),
+    (TAKEOUT_END,   r"Takeout Finished"),
+    (GAMESHOT,      r"Gameshot and match|Gameshot"),
+    (BUSTED,        r"Busted"),
+    (BULL,          r'sound-file-key\s+"(?:bullseye|bull)"'),
+    (MATCH_END,     r"match ended"),
+]
+
+KINDS = tuple(kind for kind, _ in DC_PATTERNS)
+_PRIORITY = {kind: i for i, kind in enumerate(KINDS)}
+
+# (?P<kind>...) dla każdego wzorca; lastgroup mówi, który trafił
+_COMBINED = re.compile("|".join(f"(?P<{kind}>{rx})" for kind, rx in DC_PATTERNS), re.I)
+
+# prefiltr: każdy wzorzec wymaga jednego z tych słów (małymi literami)
+KEYWORDS = ("matchon", "gameon", "next player", "takeout", "gameshot",
+            "busted", "sound-file-key", "match ended")
+
+
+class DcEvent(NamedTuple):
+    kind: str
+    line: str
+    t0: float   # time.monotonic() przyjścia linii/wiadomości
+    source: str = "stdout"   # "stdout" | "ws"
+
+
+def classify_kind(line: str) -> Optional[str]:
+    """Typ zdarzenia albo None. Przy kilku trafieniach wygrywa wzorzec
+       wcześniejszy na liście DC_PATTERNS (jak w łańcuchu if/elif)."""
+    low = line.lower()
+    for k in KEYWORDS:
+        if k in low:
+            break
+    else:
+        return None
+    best = None
+    for m in _COMBINED.finditer(line):
+        kind = m.lastgroup
+        if best is None or _PRIORITY[kind] < _PRIORITY[best]:
+            best = kind
+            if _PRIORITY[kind] == 0:
+                break
+    return best
+
+
+def classify(line: str, t0: Optional[float] = None) -> Optional[DcEvent]:
+    kind = classify_kind(line)
+    if kind is None:
+        return None
+    return DcEvent(kind, line, time.monotonic() if t0 is None else t0)
+
+
+def classify_chain(line: str) -> Optional[str]:
+    """Dawny łańcuch re.search (referencja do benchmarku i porównań)."""
+    for kind, rx in DC_PATTERNS:
+        if re.search(rx, line, re.I):
+            return kind
+    return None
+
+
+# ========= KOLEJKA ZDARZEŃ =========
+class EventQueue:
+    """Ograniczona kolejka (DcEvent, dane) między czytnikiem a konsumentem.
+       put() nigdy nie blokuje czytnika: przy pełnej kolejce wypada najstarsze.
+       Koalescencja z ostatnim oczekującym zdarzeniem:
+         - TAKEOUT_START + TAKEOUT_END -> oba znikają (segment bez zmian),
+         - (nowe, oczekujące) w `supersedes` -> oczekujące znika. Pary
+           wyznaczają reguły (dc_rules.supersedes): tylko gdy nowe zdarzenie
+           i tak zatrzyma i wyczyści wszystko, co pokazałoby oczekujące.
+           Domyślnie pusto — bez reguł żadne zdarzenie nie przepada."""
+
+    def __init__(self, maxlen=64, supersedes=frozenset()):
+        self.maxlen = maxlen
+        self.supersedes = supersedes   # podmieniany w całości przy przeładowaniu reguł
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.stats = {"put": 0, "coalesced": 0, "dropped": 0}
+
+    def put(self, ev, data=None):
+        with self.cond:
+            self.stats["put"] += 1
+            if self.items:
+                last = self.items[-1][0]
+                if ev.kind == TAKEOUT_END and last.kind == TAKEOUT_START:
+                    self.items.pop()
+                    self.stats["coalesced"] += 2
+                    return
+                if (ev.kind, last.kind) in self.supersedes:
+                    self.items.pop()
+                    self.stats["coalesced"] += 1
+            if len(self.items) >= self.maxlen:
+                self.items.popleft()
+                self.stats["dropped"] += 1
+            self.items.append((ev, data))
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """(DcEvent, dane) albo None (timeout / close())."""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            return self.items.popleft() if self.items else None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+    def report(self):
+        s = self.stats
+        return f"przyjęte {s['put']}, scalone {s['coalesced']}, wyrzucone {s['dropped']}"
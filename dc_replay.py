@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Odtwarzanie logu darts-callera przez kontroler na FakeStrip (bez tablicy i Pi).
+
+  python3 dc_replay.py log.txt [--speed 1|N|0] [--interval 1.0] [-v]
+  python3 dc_replay.py zdarzenia.jsonl --ws [--speed 0]
+
+Linie idą tą samą drogą co na żywo: dc_events.classify -> dc_queue (koalescencja)
+-> akcje z reguł (dc_rules: DC_RULES_FILE albo wbudowane) -> pętla renderująca
+-> FakeStrip. Pętlę napędza replay
+(tick po ticku w czasie logu), więc wynik jest powtarzalny przy każdej prędkości;
+--speed tylko dławi tempo względem zegara (0 = najszybciej).
+
+Znacznik czasu na początku linii jest opcjonalny: "[2024-05-01 20:11:03.123]",
+"2024-05-01 20:11:03,123", "20:11:03" ... Bez znaczników kolejne zdarzenia
+są co --interval s. W trybie --ws plik to JSONL jak z `dc_ws.py serve` (pole _t).
+"""
+
+import argparse
+import datetime
+import json
+import re
+import time
+from collections import defaultdict
+
+import dc_events
+from led_bench import load_controller
+
+_TS = re.compile(r"^\[?(?:(\d{4})-(\d{2})-(\d{2})[ T])?(\d{1,2}):(\d{2}):(\d{2})(?:[.,](\d{1,6}))?\]?\s*")
+
+
+def parse_ts(line):
+    """(sekundy albo None, linia bez znacznika)."""
+    m = _TS.match(line)
+    if not m:
+        return None, line
+    y, mo, d, h, mi, s, frac = m.groups()
+    t = int(h) * 3600 + int(mi) * 60 + int(s) + (int(frac) / 10 ** len(frac) if frac else 0.0)
+    if y:
+        t += datetime.date(int(y), int(mo), int(d)).toordinal() * 86400
+    return t, line[m.end():]
+
+
+def read_log(path, interval):
+    """Lista (czas logu [s] od początku, linia). Bez znaczników: zdarzenia co `interval`."""
+    out, t, base, prev = [], 0.0, None, None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            raw = raw.strip()
+            if not raw:
+                continue
+            ts, line = parse_ts(raw)
+            if ts is not None:
+                if prev is not None and ts < prev - 43200:   # północ w logu bez daty
+                    ts += 86400
+                prev = ts
+                if base is None:
+                    base = ts
+                t = ts - base
+            elif base is None and dc_events.classify_kind(line):
+                t += interval if out else 0.0
+            out.append((t, line))
+    return out
+
+
+def read_ws(path, interval):
+    """JSONL zdarzeń WebSocketu -> lista (czas [s], tekst JSON)."""
+    out = []
+    with open(path, encoding="utf-8") as f:
+        for i, l in enumerate(x for x in f if x.strip()):
+            msg = json.loads(l)
+            t = float(msg.pop("_t", i * interval))
+            out.append((t, json.dumps(msg)))
+    return out
+
+
+def replay(ctl, items, decode, speed=0.0, verbose=False):
+    r, q = ctl.renderer, ctl.dc_queue
+    fps = r.fps
+    handle_s = defaultdict(list)
+    n_lines = n_events = frame = 0
+    classify_s = 0.0
+    wall0 = time.perf_counter()
+
+    def drain():
+        # konsument: jak dc_event_worker, ale synchronicznie (raz na klatkę)
+        while True:
+            item = q.get(timeout=0)
+            if item is None:
+                return
+            ev, trace = item
+            t0 = time.perf_counter()
+            ctl.dc_handle_event(ev, trace)
+            handle_s[ev.kind].append(time.perf_counter() - t0)
+            if verbose:
+                print(f"{frame / fps:9.2f}s  {ev.kind:<14} dart_mode={ctl.dart_mode}")
+
+    def tick_until(t):
+        # klatki pętli do czasu logu t; przy speed > 0 w tempie zegara
+        nonlocal frame
+        while frame / fps < t:
+            if speed > 0:
+                delay = wall0 + frame / fps / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            drain()
+            r.tick()
+            frame += 1
+
+    for t, text in items:
+        tick_until(t)
+        n_lines += 1
+        c0 = time.perf_counter()
+        ev = decode(text)
+        classify_s += time.perf_counter() - c0
+        if ev is not None:
+            n_events += 1
+            ctl.dc_submit(ev)
+    drain()
+    r.tick()
+    tick_until(frame / fps + 2.0)   # dokończ animacje po ostatnim zdarzeniu
+    wall = time.perf_counter() - wall0
+    return {
+        "lines": n_lines, "events": n_events, "frames": frame, "wall": wall,
+        "classify_s": classify_s, "handle_s": handle_s,
+        "log_s": items[-1][0] if items else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Odtwarzanie logu darts-callera na FakeStrip")
+    ap.add_argument("log", help="stdout darts-callera (ze znacznikami czasu lub bez) albo JSONL z --ws")
+    ap.add_argument("--ws", action="store_true", help="plik to zdarzenia WebSocketu (JSONL)")
+    ap.add_argument("--speed", type=float, default=0.0, help="1 = czas rzeczywisty, N = N razy szybciej, 0 = max")
+    ap.add_argument("--interval", type=float, default=1.0, help="odstęp zdarzeń bez znaczników czasu [s]")
+    ap.add_argument("-v", "--verbose", action="store_true", help="wypisuj każde obsłużone zdarzenie")
+    args = ap.parse_args()
+
+    ctl = load_controller()
+    for out in ctl.outputs:
+        out.strip.realtime = False
+    if args.ws:
+        import dc_ws
+        items, decode = read_ws(args.log, args.interval), dc_ws.decode
+    else:
+        items, decode = read_log(args.log, args.interval), dc_events.classify
+
+    res = replay(ctl, items, decode, args.speed, args.verbose)
+
+    wall = res["wall"]
+    print(f"{args.log}: {res['lines']} linii, {res['events']} zdarzeń "
+          f"({ctl.dc_queue.report()}), {res['frames']} klatek")
+    print(f"czas logu {res['log_s']:.1f} s -> {wall:.2f} s (x{res['log_s'] / wall if wall else 0:.0f}), "
+          f"{res['lines'] / wall:,.0f} linii/s; sama klasyfikacja "
+          f"{res['lines'] / res['classify_s'] if res['classify_s'] else 0:,.0f} linii/s")
+    print(f"{'zdarzenie':<14} {'n':>5} {'śr. ms':>8} {'max ms':>8}")
+    for kind in dc_events.KINDS:
+        v = res["handle_s"].get(kind)
+        if v:
+            print(f"{kind:<14} {len(v):>5} {sum(v) / len(v) * 1000:8.3f} {max(v) * 1000:8.3f}")
+    seg = ctl.strip.shown[ctl.DART_START:ctl.DART_END]
+    print(f"segment {ctl.DART_START + 1}..{ctl.DART_END} (dart_mode={ctl.dart_mode}): "
+          + " ".join(f"{c:06x}" for c in seg))
+    for out in ctl.outputs[1:]:
+        print(f"{out.cfg.name} (kanał {out.cfg.channel}): " + " ".join(f"{c:06x}" for c in out.strip.shown))
+    print(f"[commit] {ctl.commit_report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Reguły zdarzenie darts-callera -> strefa -> efekt (plik INI).
+
+Sekcja = typ zdarzenia (dc_events.KINDS), np.:
+
+  [gameshot]
+  zone = dart          ; strefa (domyślnie dart)
+  effect = snake       ; efekt z tabeli kontrolera (DC_EFFECTS)
+  policy = replace     ; co z tym, co strefa pokazuje teraz
+  cycles = 1           ; reszta: parametry efektu
+  then = idle
+
+  [gameshot@ring]      ; to samo zdarzenie w kolejnej strefie (zone = ring)
+  effect = snake
+
+Sekcje jednego zdarzenia wykonują się w kolejności z pliku.
+
+policy:
+  replace   zatrzymaj idle/animację strefy i wyczyść ją, potem efekt (domyślnie)
+  snapshot  odłóż stan strefy na stos (Takeout Started), potem efekt
+  restore   przywróć ostatnią migawkę (Takeout Finished); efekt pomijany
+  keep      sam efekt, bez zatrzymywania bieżącego
+
+Parametry: color = r,g,b; delay, period [s]; cycles, count; final, then,
+after, trail (snake: dot | even), mode (nazwa stanu segmentu w logach i migawkach).
+
+Cała walidacja i budowanie akcji dzieje się przy wczytaniu (compile_rules):
+zdarzenie to jedno dispatch[kind] (lista akcji stref). Zdarzenie bez sekcji
+nic nie robi.
+Błąd w pliku -> RuleError (przy przeładowaniu zostaje poprzednia tabela).
+
+  python3 dc_rules.py defaults > dc_rules.ini   # reguły wbudowane jako plik
+  python3 dc_rules.py check dc_rules.ini        # walidacja (z efektami kontrolera)
+"""
+
+import configparser
+import sys
+from typing import NamedTuple
+
+import dc_events
+
+POLICIES = ("replace", "snapshot", "restore", "keep")
+BUILTIN = "<wbudowane>"
+
+
+class RuleError(ValueError):
+    pass
+
+
+def parse_color(v):
+    parts = [int(x) for x in v.replace(" ", "").split(",")]
+    if len(parts) != 3 or not all(0 <= x <= 255 for x in parts):
+        raise ValueError("oczekiwane r,g,b (0..255)")
+    return tuple(parts)
+
+
+def _count(v):
+    n = int(v)
+    if n < 0:
+        raise ValueError("ujemna liczba")
+    return n
+
+
+def _seconds(v):
+    s = float(v)
+    if s < 0:
+        raise ValueError("ujemny czas")
+    return s
+
+
+# parametr -> konwersja wartości z pliku
+PARAMS = {
+    "color": parse_color,
+    "delay": _seconds,
+    "period": _seconds,
+    "cycles": _count,
+    "count": _count,
+    "final": str,
+    "then": str,
+    "after": str,
+    "trail": str,
+    "mode": str,
+}
+
+
+class Rule(NamedTuple):
+    kind: str
+    zone: str
+    effect: str
+    policy: str
+    params: dict
+
+
+# reguły wbudowane = dotychczasowe zachowanie segmentu 23..28 i ringu
+# (dawny dart-caller-listener.py; bez ringu jego sekcje są pomijane)
+DEFAULT_RULES = """\
+[matchon]
+effect = solid
+color = 0,255,0
+mode = green
+
+[takeout_start]
+policy = snapshot
+effect = solid
+color = 255,255,0
+mode = yellow
+
+[takeout_end]
+policy = restore
+
+[gameshot]
+effect = snake
+delay = 0.03
+cycles = 1
+final = clear
+then = idle
+
+[busted]
+effect = solid
+color = 255,0,0
+mode = busted
+
+[bull]
+effect = flash
+color = 255,0,0
+count = 6
+period = 0.08
+after = cw
+
+[match_end]
+policy = keep
+effect = idle
+
+[matchon@ring]
+effect = solid
+color = 0,255,0
+
+[takeout_start@ring]
+policy = snapshot
+effect = solid
+color = 255,255,0
+
+[takeout_end@ring]
+policy = restore
+
+[gameshot@ring]
+effect = snake
+trail = even
+delay = 0.03
+cycles = 10
+then = idle
+
+[busted@ring]
+effect = solid
+color = 255,0,0
+
+[bull@ring]
+policy = keep
+effect = flash
+color = 255,0,0
+count = 8
+period = 0.1
+after = restore
+
+[match_end@ring]
+policy = keep
+effect = idle
+"""
+
+
+def parse_rules(text, source="<reguły>"):
+    """Tekst INI -> {kind: [Rule, ...]} (typy parametrów już skonwertowane)."""
+    cp = configparser.ConfigParser(inline_comment_prefixes=(";", "#"), interpolation=None)
+    try:
+        cp.read_string(text, source)
+    except configparser.Error as e:
+        raise RuleError(str(e)) from e
+    rules = {}
+    for name in cp.sections():
+        kind, _, zone = name.partition("@")
+        if kind not in dc_events.KINDS:
+            raise RuleError(f"{source}: [{name}] — nieznane zdarzenie (są: {', '.join(dc_events.KINDS)})")
+        sec = dict(cp[name])
+        zone = sec.pop("zone", zone or "dart")
+        effect = sec.pop("effect", "none")
+        policy = sec.pop("policy", "replace")
+        if policy not in POLICIES:
+            raise RuleError(f"{source}: [{name}] policy = {policy} (są: {', '.join(POLICIES)})")
+        params = {}
+        for key, value in sec.items():
+            conv = PARAMS.get(key)
+            if conv is None:
+                raise RuleError(f"{source}: [{name}] {key} — nieznany parametr")
+            try:
+                params[key] = conv(value)
+            except ValueError as e:
+                raise RuleError(f"{source}: [{name}] {key} = {value}: {e}") from e
+        rules.setdefault(kind, []).append(Rule(kind, zone, effect, policy, params))
+    return rules
+
+
+def default_rules(zones=None):
+    """Reguły wbudowane; zones -> tylko dla stref, które są (np. bez ringu)."""
+    rules = parse_rules(DEFAULT_RULES, BUILTIN)
+    if zones is None:
+        return rules
+    out = {}
+    for kind, lst in rules.items():
+        lst = [r for r in lst if r.zone in zones]
+        if lst:
+            out[kind] = lst
+    return out
+
+
+def load_rules(path, zones=None):
+    """(reguły, skąd): plik, a gdy go nie ma — reguły wbudowane (dla `zones`)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return default_rules(zones), BUILTIN
+    except OSError as e:
+        raise RuleError(f"{path}: {e}") from e
+    return parse_rules(text, path), path
+
+
+def compile_rules(rules, build):
+    """{kind: [Rule]} -> {kind: (build(rule), ...)}; build sprawdza efekt/strefę/parametry."""
+    table = {}
+    for kind, lst in rules.items():
+        built = []
+        for rule in lst:
+            try:
+                built.append(build(rule))
+            except (KeyError, TypeError, ValueError) as e:
+                raise RuleError(f"[{kind}] zone={rule.zone} effect={rule.effect}: {e}") from e
+        table[kind] = tuple(built)
+    return table
+
+
+def supersedes(rules):
+    """Pary (nowe, oczekujące) dla dc_events.EventQueue: oczekujące zdarzenie
+       może przepaść, gdy każda reguła nowego to policy=replace, a strefy obu
+       są te same — replace i tak zatrzyma i wyczyści to, co by pokazało.
+       Zdarzenia z migawkami (snapshot/restore) nigdy nie przepadają."""
+    zones = {kind: frozenset(r.zone for r in lst) for kind, lst in rules.items()}
+    replace = [kind for kind, lst in rules.items() if all(r.policy == "replace" for r in lst)]
+    plain = [kind for kind, lst in rules.items()
+             if not any(r.policy in ("snapshot", "restore") for r in lst)]
+    return frozenset((new, old) for new in replace for old in plain
+                     if zones[new] == zones[old])
+
+
+def main(argv):
+    if len(argv) == 2 and argv[1] == "defaults":
+        sys.stdout.write(DEFAULT_RULES)
+        return 0
+    if len(argv) == 3 and argv[1] == "check":
+        from led_bench import load_controller
+        ctl = load_controller()
+        try:
+            rules, source = load_rules(argv[2], ctl.ZONES)
+            table = compile_rules(rules, ctl.build_rule)
+        except RuleError as e:
+            print(f"BŁĄD: {e}")
+            return 1
+        print(f"{source}: OK, {sum(map(len, table.values()))} reguł dla {len(table)} zdarzeń")
+        for r in (r for lst in rules.values() for r in lst):
+            params = " ".join(f"{k}={v}" for k, v in r.params.items())
+            print(f"  {r.kind:<14} {r.zone:<6} {r.policy:<9} {r.effect} {params}")
+        pairs = sorted(supersedes(rules))
+        if pairs:
+            print(f"  scalane w kolejce (nowe zastępuje oczekujące): "
+                  f"{', '.join(f'{new} > {old}' for new, old in pairs)}")
+        missing = [k for k in dc_events.KINDS if k not in table]
+        if missing:
+            print(f"  bez reguły (ignorowane): {', '.join(missing)}")
+        return 0
+    print("użycie: dc_rules.py defaults | dc_rules.py check PLIK.ini")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Zdarzenia darts-callera z jego serwera WebSocket (-HP 8079) zamiast stdout.
+
+Minimalny WebSocket (RFC 6455) na samej bibliotece standardowej: klient dla
+kontrolera i serwer-atrapa, który odtwarza nagrane zdarzenia (bez tablicy).
+
+  python3 dc_ws.py serve [zdarzenia.jsonl] [--port 8079] [--speed 1] [--loop]
+  python3 dc_ws.py listen [--url ws://127.0.0.1:8079]
+
+Plik .jsonl: jeden obiekt JSON na linię, tak jak wysyła darts-caller;
+opcjonalne pole "_t" = sekundy od startu (bez niego: co --interval s).
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import time
+from urllib.parse import urlsplit
+
+import dc_events
+from dc_events import DcEvent
+
+DC_WS_URL = os.getenv("DC_WS_URL", "ws://127.0.0.1:8079")
+
+# zdarzenie JSON -> typ zdarzenia (dc_events); klucz = "event" albo
+# "event:<pole>" dla board-status (data.status) i darts-thrown (game.dartValue)
+WS_EVENT_MAP = {
+    "match-started": dc_events.MATCHON,
+    "game-started": dc_events.MATCHON,
+    "darts-pulled": dc_events.MATCHON,          # następny gracz
+    "board-status:Takeout Started": dc_events.TAKEOUT_START,
+    "board-status:Takeout Finished": dc_events.TAKEOUT_END,
+    "game-won": dc_events.GAMESHOT,
+    "match-won": dc_events.GAMESHOT,
+    "busted": dc_events.BUSTED,
+    "darts-thrown:25": dc_events.BULL,
+    "darts-thrown:50": dc_events.BULL,
+    "match-ended": dc_events.MATCH_END,
+}
+
+
+def ws_key(msg):
+    """Klucz do WS_EVENT_MAP dla zdekodowanej wiadomości (dict)."""
+    ev = msg.get("event")
+    if ev == "board-status":
+        return f"board-status:{(msg.get('data') or {}).get('status')}"
+    if ev == "darts-thrown":
+        return f"darts-thrown:{(msg.get('game') or {}).get('dartValue')}"
+    return ev
+
+
+def decode(text, t0=None):
+    """Tekst ramki -> DcEvent albo None (nie-JSON, nieznane zdarzenie)."""
+    try:
+        msg = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(msg, dict):
+        return None
+    kind = WS_EVENT_MAP.get(ws_key(msg))
+    if kind is None:
+        return None
+    return DcEvent(kind, text, time.monotonic() if t0 is None else t0, "ws")
+
+
+# ========= WEBSOCKET (RFC 6455) =========
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class WsClosed(Exception):
+    pass
+
+
+def _accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+
+
+def _parse_http_head(head):
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        k, _, v = line.partition(":")
+        headers[k.strip().lower()] = v.strip()
+    return lines[0], headers
+
+
+def _read_http_head(sock):
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(1024)
+        if not chunk:
+            raise WsClosed("połączenie zamknięte w handshake")
+        data += chunk
+    head, rest = data.split(b"\r\n\r\n", 1)
+    return _parse_http_head(head) + (rest,)
+
+
+def _handshake_request(u):
+    key = base64.b64encode(os.urandom(16)).decode()
+    path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    return key, (f"GET {path} HTTP/1.1\r\nHost: {u.netloc}\r\nUpgrade: websocket\r\n"
+                 f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                 f"Sec-WebSocket-Version: 13\r\n\r\n").encode()
+
+
+def _check_handshake(key, status, headers):
+    if status.split()[1:2] != ["101"] or headers.get("sec-websocket-accept") != _accept_key(key):
+        raise WsClosed(f"handshake odrzucony: {status}")
+
+
+def _unmask(payload, mask):
+    return bytes(c ^ mask[i & 3] for i, c in enumerate(payload))
+
+
+def _encode_frame(opcode, payload, client):
+    n = len(payload)
+    head = bytes([0x80 | opcode])
+    mbit = 0x80 if client else 0
+    if n < 126:
+        head += bytes([mbit | n])
+    elif n < 1 << 16:
+        head += bytes([mbit | 126]) + struct.pack("!H", n)
+    else:
+        head += bytes([mbit | 127]) + struct.pack("!Q", n)
+    if client:
+        mask = os.urandom(4)
+        return head + mask + _unmask(payload, mask)
+    return head + payload
+
+
+class WsConnection:
+    """Jedno połączenie; klient maskuje ramki, serwer nie (RFC 6455 5.3)."""
+
+    def __init__(self, sock, client, buf=b""):
+        self.sock = sock
+        self.client = client
+        self.buf = buf
+
+    def _recv_exact(self, n):
+        while len(self.buf) < n:
+            chunk = self.sock.recv(max(4096, n - len(self.buf)))
+            if not chunk:
+                raise WsClosed("EOF")
+            self.buf += chunk
+        out, self.buf = self.buf[:n], self.buf[n:]
+        return out
+
+    def _recv_frame(self):
+        b0, b1 = self._recv_exact(2)
+        n = b1 & 0x7F
+        if n == 126:
+            n = struct.unpack("!H", self._recv_exact(2))[0]
+        elif n == 127:
+            n = struct.unpack("!Q", self._recv_exact(8))[0]
+        mask = self._recv_exact(4) if b1 & 0x80 else None
+        payload = self._recv_exact(n)
+        if mask:
+            payload = _unmask(payload, mask)
+        return bool(b0 & 0x80), b0 & 0x0F, payload
+
+    def send(self, opcode, payload=b""):
+        self.sock.sendall(_encode_frame(opcode, payload, self.client))
+
+    def send_text(self, text):
+        self.send(OP_TEXT, text.encode("utf-8"))
+
+    def recv(self):
+        """Następna wiadomość (str dla tekstu, bytes dla binarnych);
+           ping/pong/fragmentacja obsłużone tutaj. WsClosed po zamknięciu."""
+        parts, first_op = [], None
+        while True:
+            fin, op, payload = self._recv_frame()
+            if op == OP_PING:
+                self.send(OP_PONG, payload)
+                continue
+            if op == OP_PONG:
+                continue
+            if op == OP_CLOSE:
+                try:
+                    self.send(OP_CLOSE, payload[:2])
+                except OSError:
+                    pass
+                raise WsClosed("close")
+            if op != OP_CONT:
+                first_op = op
+            parts.append(payload)
+            if fin:
+                data = b"".join(parts)
+                return data.decode("utf-8", "replace") if first_op == OP_TEXT else data
+
+    def close(self):
+        """Zamknij (także z innego wątku: shutdown budzi blokujące recv)."""
+        try:
+            self.send(OP_CLOSE, struct.pack("!H", 1000))
+        except OSError:
+            pass
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def connect(url=DC_WS_URL, timeout=3.0):
+    """Otwórz połączenie ws:// (handshake z limitem czasu, potem gniazdo blokujące)."""
+    u = urlsplit(url)
+    if u.scheme != "ws":
+        raise ValueError(f"obsługiwane tylko ws:// ({url})")
+    sock = socket.create_connection((u.hostname, u.port or 80), timeout=timeout)
+    try:
+        key, request = _handshake_request(u)
+        sock.sendall(request)
+        status, headers, rest = _read_http_head(sock)
+        _check_handshake(key, status, headers)
+    except Exception:
+        sock.close()
+        raise
+    sock.settimeout(None)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return WsConnection(sock, client=True, buf=rest)
+
+
+class AsyncWsConnection:
+    """Klient na asyncio (pętla I/O kontrolera): to samo co WsConnection,
+       ale recv() czeka na gniazdo w pętli zamiast blokować wątek."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def _recv_frame(self):
+        try:
+            b0, b1 = await self.reader.readexactly(2)
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            mask = await self.reader.readexactly(4) if b1 & 0x80 else None
+            payload = await self.reader.readexactly(n)
+        except asyncio.IncompleteReadError:
+            raise WsClosed("EOF") from None
+        if mask:
+            payload = _unmask(payload, mask)
+        return bool(b0 & 0x80), b0 & 0x0F, payload
+
+    async def send(self, opcode, payload=b""):
+        self.writer.write(_encode_frame(opcode, payload, True))
+        await self.writer.drain()
+
+    async def recv(self):
+        parts, first_op = [], None
+        while True:
+            fin, op, payload = await self._recv_frame()
+            if op == OP_PING:
+                await self.send(OP_PONG, payload)
+                continue
+            if op == OP_PONG:
+                continue
+            if op == OP_CLOSE:
+                try:
+                    await self.send(OP_CLOSE, payload[:2])
+                except OSError:
+                    pass
+                raise WsClosed("close")
+            if op != OP_CONT:
+                first_op = op
+            parts.append(payload)
+            if fin:
+                data = b"".join(parts)
+                return data.decode("utf-8", "replace") if first_op == OP_TEXT else data
+
+    def close(self):
+        try:
+            self.writer.write(_encode_frame(OP_CLOSE, struct.pack("!H", 1000), True))
+        except (OSError, RuntimeError):
+            pass
+        self.writer.close()
+
+
+async def connect_async(url=DC_WS_URL, timeout=3.0):
+    """connect() dla pętli asyncio."""
+    u = urlsplit(url)
+    if u.scheme != "ws":
+        raise ValueError(f"obsługiwane tylko ws:// ({url})")
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(u.hostname, u.port or 80), timeout)
+    try:
+        key, request = _handshake_request(u)
+        writer.write(request)
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+        except asyncio.IncompleteReadError:
+            raise WsClosed("połączenie zamknięte w handshake") from None
+        status, headers = _parse_http_head(head[:-4])
+        _check_handshake(key, status, headers)
+    except BaseException:
+        writer.close()
+        raise
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return AsyncWsConnection(reader, writer)
+
+
+def accept(sock):
+    """Strona serwera: odbierz handshake klienta na zaakceptowanym gnieździe."""
+    _, headers, rest = _read_http_head(sock)
+    key = headers.get("sec-websocket-key", "")
+    sock.sendall((f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Accept: {_accept_key(key)}\r\n\r\n").encode())
+    return WsConnection(sock, client=False, buf=rest)
+
+
+# ========= ATRAPA SERWERA DARTS-CALLERA =========
+# krótki mecz, gdy serve nie dostał pliku
+SAMPLE_EVENTS = [
+    {"_t": 0.0, "event": "match-started", "player": "Jan"},
+    {"_t": 1.0, "event": "darts-thrown", "player": "Jan", "game": {"dartValue": "60"}},
+    {"_t": 1.5, "event": "darts-thrown", "player": "Jan", "game": {"dartValue": "50"}},
+    {"_t": 2.0, "event": "board-status", "data": {"status": "Takeout Started"}},
+    {"_t": 3.0, "event": "board-status", "data": {"status": "Takeout Finished"}},
+    {"_t": 3.1, "event": "darts-pulled", "player": "Ola"},
+    {"_t": 4.0, "event": "busted", "player": "Ola"},
+    {"_t": 5.0, "event": "board-status", "data": {"status": "Takeout Started"}},
+    {"_t": 5.2, "event": "board-status", "data": {"status": "Takeout Finished"}},
+    {"_t": 6.0, "event": "game-won", "player": "Jan"},
+    {"_t": 8.0, "event": "match-ended"},
+]
+
+
+def load_events(path, interval):
+    """Lista (t, wiadomość JSON jako tekst) z pliku .jsonl albo SAMPLE_EVENTS."""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            msgs = [json.loads(l) for l in f if l.strip()]
+    else:
+        msgs = SAMPLE_EVENTS
+    out = []
+    for i, m in enumerate(msgs):
+        m = dict(m)
+        t = m.pop("_t", i * interval)
+        out.append((float(t), json.dumps(m)))
+    return out
+
+
+def serve(events, host="127.0.0.1", port=8079, speed=1.0, loop=False):
+    """Odtwarzaj zdarzenia każdemu podłączonemu klientowi (po kolei)."""
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind((host, port))
+    srv.listen(1)
+    print(f"[dc_ws] atrapa darts-callera: ws://{host}:{port} ({len(events)} zdarzeń)")
+    try:
+        while True:
+            sock, addr = srv.accept()
+            print(f"[dc_ws] klient {addr[0]}:{addr[1]}")
+            conn = accept(sock)
+            try:
+                while True:
+                    start = time.monotonic()
+                    for t, text in events:
+                        delay = start + t / speed - time.monotonic() if speed > 0 else 0
+                        if delay > 0:
+                            time.sleep(delay)
+                        conn.send_text(text)
+                    if not loop:
+                        break
+            except OSError as e:
+                print(f"[dc_ws] klient rozłączony: {e}")
+            finally:
+                conn.close()
+    finally:
+        srv.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="WebSocket zdarzeń darts-callera: atrapa serwera / podgląd")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("serve", help="odtwarzaj nagrane zdarzenia jak darts-caller -HP")
+    p.add_argument("events", nargs="?", help="plik .jsonl (domyślnie przykładowy mecz)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8079)
+    p.add_argument("--speed", type=float, default=1.0, help="mnożnik tempa (0 = bez czekania)")
+    p.add_argument("--interval", type=float, default=1.0, help="odstęp, gdy brak pola _t [s]")
+    p.add_argument("--loop", action="store_true", help="odtwarzaj w kółko")
+
+    p = sub.add_parser("listen", help="podłącz się i wypisuj zdekodowane zdarzenia")
+    p.add_argument("--url", default=DC_WS_URL)
+
+    args = ap.parse_args()
+    if args.cmd == "serve":
+        serve(load_events(args.events, args.interval), args.host, args.port, args.speed, args.loop)
+    else:
+        conn = connect(args.url)
+        try:
+            while True:
+                text = conn.recv()
+                ev = decode(text) if isinstance(text, str) else None
+                print(f"{ev.kind if ev else '-':<14} {text}")
+        except (WsClosed, KeyboardInterrupt):
+            pass
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
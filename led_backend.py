@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Backend paska LED: prawdziwy rpi_ws281x albo FakeStrip (bez sprzętu).
+
+LED_BACKEND=ws281x (domyślnie) | fake
+
+Dwa paski na kanałach PWM 0 i 1 dzielą jeden kontroler PWM (zegar, FIFO,
+DMA): muszą być w jednym ws2811_t (open_strips), z jedną częstotliwością —
+dwa osobne PixelStrip nadpisują sobie nawzajem konfigurację przy begin().
+"""
+
+import atexit
+import os
+import time
+from array import array
+from collections import deque
+
+try:
+    from rpi_ws281x import PixelStrip, ws
+except ImportError:   # poza Raspberry Pi
+    PixelStrip = None
+    ws = None
+
+LED_BACKEND = os.getenv("LED_BACKEND", "ws281x")
+
+WS281X_RESET_S = 55e-6   # przerwa "reset" po każdej ramce
+
+
+def strip_type(name):
+    """Stała ws.WS2811_STRIP_<name>; bez biblioteki — sama nazwa (FakeStrip jej nie używa)."""
+    return getattr(ws, "WS2811_STRIP_" + name) if ws is not None else name
+
+
+class FakeStrip:
+    """Atrapa PixelStrip z tym samym API.
+       Zapisuje każde setPixelColor/setBrightness/show ze znacznikiem czasu
+       (time.monotonic) i symuluje czas transferu WS281x: 24 bity/LED przy freq_hz
+       (~30 µs/LED przy 800 kHz). Jak ws2811_render(): show() czeka na koniec
+       poprzedniego transferu, startuje nowy i wraca."""
+
+    def __init__(self, num, pin=18, freq_hz=800_000, dma=10, invert=False,
+                 brightness=255, channel=0, strip_type=None,
+                 realtime=True, record_limit=200_000):
+        self.num = num
+        self.pin = pin
+        self.channel = channel
+        self.strip_type = strip_type
+        self.realtime = realtime
+        self.leds = array('I', [0]) * num
+        self.shown = array('I', [0]) * num    # co "świeci" po ostatnim show()
+        self.brightness = brightness
+        self.transfer_s = num * 24 / freq_hz + WS281X_RESET_S
+        self.busy_until = 0.0
+        self.events = deque(maxlen=record_limit)   # (t, "set"|"bright"|"show", arg)
+        self.sets = 0
+        self.shows = 0
+        self.wait_s = 0.0   # ile show() czekało na poprzedni transfer
+        self.device = self  # co renderuje show() (Ws281xChannel: wspólne ws2811_t)
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return self.num
+
+    def setPixelColor(self, n, color):
+        self.leds[n] = color
+        self.sets += 1
+        self.events.append((time.monotonic(), "set", (n, color)))
+
+    def setPixelColorRGB(self, n, red, green, blue, white=0):
+        self.setPixelColor(n, (white << 24) | (red << 16) | (green << 8) | blue)
+
+    def getPixelColor(self, n):
+        return self.leds[n]
+
+    def getPixels(self):
+        return self.leds
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+        self.events.append((time.monotonic(), "bright", brightness))
+
+    def getBrightness(self):
+        return self.brightness
+
+    def show(self):
+        now = time.monotonic()
+        if now < self.busy_until:
+            self.wait_s += self.busy_until - now
+            if self.realtime:
+                time.sleep(self.busy_until - now)
+            now = self.busy_until
+        self.busy_until = now + self.transfer_s
+        self.shown[:] = self.leds
+        self.shows += 1
+        self.events.append((now, "show", self.brightness))
+
+    def reset_stats(self):
+        self.events.clear()
+        self.sets = 0
+        self.shows = 0
+        self.wait_s = 0.0
+
+
+def open_strip(num, pin, freq_hz, dma, invert, brightness, channel, strip_type, backend=None):
+    """Utwórz i uruchom (begin) pasek wybranego backendu."""
+    backend = backend or LED_BACKEND
+    if backend == "fake":
+        strip = FakeStrip(num, pin, freq_hz, dma, invert, brightness, channel, strip_type=strip_type)
+    else:
+        if PixelStrip is None:
+            raise RuntimeError("brak rpi_ws281x — zainstaluj albo uruchom z LED_BACKEND=fake")
+        strip = PixelStrip(num, pin, freq_hz, dma, invert, brightness, channel, strip_type=strip_type)
+    strip.begin()
+    return strip
+
+
+class Ws281xDevice:
+    """Jeden ws2811_t z oboma kanałami PWM (jak przykład multistrip z
+       rpi_ws281x): jedno ws2811_init i jedno ws2811_render dla obu pasków."""
+
+    def __init__(self, freq_hz, dma):
+        self.leds = ws.new_ws2811_t()
+        for channum in range(2):   # nieużywany kanał: 0 LED
+            chan = ws.ws2811_channel_get(self.leds, channum)
+            ws.ws2811_channel_t_count_set(chan, 0)
+            ws.ws2811_channel_t_gpionum_set(chan, 0)
+            ws.ws2811_channel_t_invert_set(chan, 0)
+            ws.ws2811_channel_t_brightness_set(chan, 0)
+        ws.ws2811_t_freq_set(self.leds, freq_hz)
+        ws.ws2811_t_dmanum_set(self.leds, dma)
+        self.started = False
+        atexit.register(self.cleanup)
+
+    def begin(self):
+        if self.started:
+            return
+        resp = ws.ws2811_init(self.leds)
+        if resp != 0:
+            raise RuntimeError(f"ws2811_init: {resp} ({ws.ws2811_get_return_t_str(resp)})")
+        self.started = True
+
+    def render(self):
+        resp = ws.ws2811_render(self.leds)
+        if resp != 0:
+            raise RuntimeError(f"ws2811_render: {resp} ({ws.ws2811_get_return_t_str(resp)})")
+
+    def cleanup(self):
+        if self.leds is not None:
+            if self.started:   # bufory LED alokuje dopiero ws2811_init
+                ws.ws2811_fini(self.leds)
+            ws.delete_ws2811_t(self.leds)
+            self.leds = None
+
+
+class Ws281xChannel:
+    """Kanał PWM wspólnego Ws281xDevice z API PixelStrip (to, czego używa
+       kontroler). show() renderuje całe urządzenie, czyli oba kanały."""
+
+    def __init__(self, device, num, pin, invert, brightness, channel, strip_type):
+        self.device = device
+        self.num = num
+        self.channel = channel
+        self._chan = ws.ws2811_channel_get(device.leds, channel)
+        ws.ws2811_channel_t_gamma_set(self._chan, list(range(256)))
+        ws.ws2811_channel_t_count_set(self._chan, num)
+        ws.ws2811_channel_t_gpionum_set(self._chan, pin)
+        ws.ws2811_channel_t_invert_set(self._chan, 1 if invert else 0)
+        ws.ws2811_channel_t_brightness_set(self._chan, brightness)
+        ws.ws2811_channel_t_strip_type_set(self._chan, strip_type)
+
+    def begin(self):
+        self.device.begin()
+
+    def numPixels(self):
+        return self.num
+
+    def setPixelColor(self, n, color):
+        ws.ws2811_led_set(self._chan, n, color)
+
+    def getPixelColor(self, n):
+        return ws.ws2811_led_get(self._chan, n)
+
+    def setBrightness(self, brightness):
+        ws.ws2811_channel_t_brightness_set(self._chan, brightness)
+
+    def getBrightness(self):
+        return ws.ws2811_channel_t_brightness_get(self._chan)
+
+    def show(self):
+        self.device.render()
+
+
+def open_strips(channels, freq_hz, dma, backend=None):
+    """Paski na kanałach PWM jednego kontrolera, uruchomione (begin).
+       channels = [(num, pin, invert, brightness, channel, strip_type)], kanały
+       różne, 0 lub 1. Wspólne freq_hz i dma — tak działa sprzęt."""
+    nums = [c[4] for c in channels]
+    if len(set(nums)) != len(nums) or not set(nums) <= {0, 1}:
+        raise ValueError(f"kanały PWM {nums}: różne, 0 lub 1")
+    backend = backend or LED_BACKEND
+    if backend == "fake":
+        strips = [FakeStrip(num, pin, freq_hz, dma, invert, brightness, channel, strip_type=st)
+                  for num, pin, invert, brightness, channel, st in channels]
+    else:
+        if ws is None:
+            raise RuntimeError("brak rpi_ws281x — zainstaluj albo uruchom z LED_BACKEND=fake")
+        device = Ws281xDevice(freq_hz, dma)
+        strips = [Ws281xChannel(device, *c) for c in channels]
+    for strip in strips:
+        strip.begin()
+    return strips
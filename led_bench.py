@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmarki silnika LED (bez sprzętu).
+
+  python3 led_bench.py blend [--leds 28 300 1000] [--steps 24] [--repeat 20]
+  python3 led_bench.py run [snake_combo crossfade preempt gameshot bull idle] [--fps 50] [--no-wire]
+  python3 led_bench.py scale [--leds 28 300 1000] [--fps 60] [--seconds 3] [--no-wire]
+  python3 led_bench.py classify [log darts-callera] [--lines 50000] [--repeat 5]
+
+`run` ładuje autodarts-led-controller.py z LED_BACKEND=fake (FakeStrip) i puszcza
+prawdziwe efekty przez pętlę renderującą. `scale` robi to samo dla tablicy
+o LED_BOARD_COUNT diod (snake, przejścia, idle) i zestawia wynik z limitem
+przewodu WS281x (~30 µs/LED na kanał przy 800 kHz).
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import time
+
+import dc_events
+from led_frame import FrameBuffer, Crossfade, np
+import led_backend
+from led_backend import WS281X_RESET_S
+
+
+# ========= CROSS-FADE =========
+def _legacy_crossfade(start, target, steps):
+    """Dawna wersja z autodarts-led-controller.py: listy krotek + lerp na kanał."""
+    def lerp(a, b, t): return int(a + (b - a) * t)
+    blended = start
+    for s in range(1, steps + 1):
+        t = s / steps
+        blended = [(lerp(sr, tr, t), lerp(sg, tg, t), lerp(sb, tb, t))
+                   for (sr, sg, sb), (tr, tg, tb) in zip(start, target)]
+    return blended
+
+
+def _engine_crossfade(start, target, steps, use_numpy):
+    out = FrameBuffer(len(start))
+    fade = Crossfade(start, target, steps, use_numpy=use_numpy)
+    for s in range(steps):
+        fade.apply(s, out)
+    return out
+
+
+def _timeit(fn, repeat):
+    """Najlepszy czas z `repeat` uruchomień [s]."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _random_rgb(n, rnd):
+    return [(rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)) for _ in range(n)]
+
+
+def cmd_blend(args):
+    rnd = random.Random(1)
+    print(f"cross-fade, {args.steps} kroków, najlepszy z {args.repeat} (ms na całe przejście)")
+    print(f"{'LED':>6} {'stary (krotki)':>16} {'python (SWAR)':>16} {'numpy':>16}")
+    for n in args.leds:
+        a_rgb, b_rgb = _random_rgb(n, rnd), _random_rgb(n, rnd)
+        a, b = FrameBuffer.from_rgb(a_rgb), FrameBuffer.from_rgb(b_rgb)
+
+        legacy = _timeit(lambda: _legacy_crossfade(a_rgb, b_rgb, args.steps), args.repeat)
+        pure = _timeit(lambda: _engine_crossfade(a, b, args.steps, False), args.repeat)
+        cols = [f"{legacy*1000:16.3f}", f"{pure*1000:9.3f} (x{legacy/pure:4.1f})"]
+        if np is not None:
+            vec = _timeit(lambda: _engine_crossfade(a, b, args.steps, True), args.repeat)
+            cols.append(f"{vec*1000:9.3f} (x{legacy/vec:4.1f})")
+        else:
+            cols.append(f"{'brak numpy':>16}")
+        print(f"{n:>6} " + " ".join(cols))
+
+
+# ========= KLASYFIKACJA LINII DART-CALLERA =========
+_NOISE = [
+    "Connected to Autodarts board 1a2b3c4d",
+    "CALLER: Jan - remaining 241",
+    "Websocket message: {\"event\": \"darts-thrown\", \"player\": \"Jan\", \"score\": \"T20\"}",
+    "Playing /home/raczqq/media/en-US-Joey-Male/60.mp3 (volume 0.5)",
+    "Player Ola throws S5 (5)",
+    "Keep-alive: ping 31 ms",
+]
+_EVENTS = [
+    "Matchon: x01 501", "Gameon", "Next player: Ola", "Takeout Started", "Takeout Finished",
+    "Gameshot and match!", "Gameshot", "Busted!", 'sound-file-key "bullseye"', "match ended",
+]
+
+
+def synthetic_log(n, rnd, event_ratio=0.05):
+    """Log podobny do stdout darts-callera: głównie szum, ~5% zdarzeń."""
+    return [rnd.choice(_EVENTS) if rnd.random() < event_ratio else rnd.choice(_NOISE)
+            for _ in range(n)]
+
+
+def cmd_classify(args):
+    if args.log:
+        with open(args.log, encoding="utf-8", errors="replace") as f:
+            lines = [l.strip() for l in f if l.strip()]
+        src = args.log
+    else:
+        lines = synthetic_log(args.lines, random.Random(1))
+        src = "syntetyczny log"
+    old = [dc_events.classify_chain(l) for l in lines]
+    new = [dc_events.classify_kind(l) for l in lines]
+    diff = sum(a != b for a, b in zip(old, new))
+    print(f"{src}: {len(lines)} linii, zdarzeń {sum(k is not None for k in new)}, "
+          f"różnic między klasyfikatorami {diff}")
+
+    def run(fn):
+        return lambda: [fn(l) for l in lines]
+
+    t_old = _timeit(run(dc_events.classify_chain), args.repeat)
+    t_new = _timeit(run(dc_events.classify_kind), args.repeat)
+    print(f"{'łańcuch re.search':<22} {len(lines)/t_old:12,.0f} linii/s")
+    print(f"{'prefiltr + alternatywa':<22} {len(lines)/t_new:12,.0f} linii/s (x{t_old/t_new:.1f})")
+
+
+# ========= HARNESS KONTROLERA (FakeStrip) =========
+CONTROLLER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "autodarts-led-controller.py")
+
+
+def load_controller(path=CONTROLLER):
+    """Załaduj kontroler jako moduł z FakeStrip (bez sprzętu; wątki nie startują)."""
+    os.environ["LED_BACKEND"] = "fake"
+    led_backend.LED_BACKEND = "fake"   # moduł mógł być już zaimportowany z inną wartością
+    spec = importlib.util.spec_from_file_location("autodarts_led_controller", path)
+    ctl = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(ctl)
+    return ctl
+
+
+def _scenarios(ctl, seconds):
+    def crossfades():
+        for name in ("red", "ww", "all_max", "blue"):
+            ctl.renderer.run_blocking("main", ctl.crossfade_to_frame(ctl.preview_frame(name), 0.5))
+
+    def preempt():
+        # przełączanie efektu w trakcie animacji: ile do pierwszej klatki nowego
+        for name in ("snake_combo", "red", "snake_combo", "ww", "snake_combo", "blue"):
+            trace = ctl.Trace(f"set_effect:{name}")
+            with ctl.traced(trace):
+                ctl.set_effect(name, fade_time=0.5)
+            time.sleep(0.3)
+        ctl.renderer.run_blocking("main", ctl.effect_producer("red", fade=False))
+
+    def idle():
+        ctl.dc_idle_start()
+        time.sleep(seconds)
+        ctl.dc_idle_stop_fn()
+
+    return {
+        "snake_combo": lambda: ctl.renderer.run_blocking("main", ctl.effect_producer("snake_combo", fade=False)),
+        "crossfade": crossfades,
+        "preempt": preempt,
+        "gameshot": lambda: ctl.dc_gameshot().wait(),
+        "bull": lambda: ctl.dc_bull().wait(),
+        "idle": idle,
+    }
+
+
+def _measure(ctl, fn):
+    r, st = ctl.renderer, ctl.strip
+    st.reset_stats()
+    r.reset_stats()
+    w0, c0 = time.perf_counter(), time.process_time()
+    fn()
+    wall = time.perf_counter() - w0
+    cpu = time.process_time() - c0
+    frames = max(1, r.frames)
+    return {
+        "wall": wall, "fps": r.frames / wall, "shows_s": st.shows / wall, "cpu_pct": cpu / wall * 100,
+        "cpu_ms": cpu / frames * 1000, "frame_max_ms": r.frame_time_max * 1000,
+        "jitter_ms": r.jitter * 1000, "dropped": r.dropped, "wire_wait_ms": st.wait_s * 1000,
+    }
+
+
+def cmd_run(args):
+    if args.fps:
+        os.environ["LED_FPS"] = str(args.fps)
+    if args.power_limit is not None:
+        os.environ["LED_POWER_LIMIT_MA"] = str(args.power_limit)
+    ctl = load_controller()
+    for out in ctl.outputs:
+        out.strip.realtime = not args.no_wire
+    if args.brightness is not None:
+        ctl.brightness_level = args.brightness
+    scen = _scenarios(ctl, args.seconds)
+    names = args.scenarios or list(scen)
+    unknown = [n for n in names if n not in scen]
+    if unknown:
+        raise SystemExit(f"nieznane scenariusze: {', '.join(unknown)}")
+    ctl.renderer.start()
+    print(f"FakeStrip {ctl.LED_TOTAL} LED ({', '.join(f'{o.cfg.name} {o.cfg.count}' for o in ctl.outputs)}), cel {ctl.renderer.fps} FPS, "
+          f"transfer {ctl.strip.transfer_s*1e6:.0f} µs/klatkę")
+    print(f"{'scenariusz':<12} {'czas s':>7} {'FPS':>6} {'show/s':>7} {'CPU ms/kl':>10} {'CPU %':>6} "
+          f"{'max kl ms':>10} {'jitter ms':>10} {'zgub.':>6} {'czek. DMA ms':>13}")
+    try:
+        for name in names:
+            m = _measure(ctl, scen[name])
+            print(f"{name:<12} {m['wall']:7.2f} {m['fps']:6.1f} {m['shows_s']:7.1f} {m['cpu_ms']:10.3f} {m['cpu_pct']:6.2f} "
+                  f"{m['frame_max_ms']:10.3f} {m['jitter_ms']:10.3f} {m['dropped']:6d} {m['wire_wait_ms']:13.1f}")
+    finally:
+        ctl.renderer.stop()
+    if "idle" in names:
+        print(f"\nidle: {ctl.idle_report()}")
+    print(f"\nmoc: {ctl.power.report()}")
+    if ctl.led_latency.stats.summary():
+        print(f"\nopóźnienie zdarzenie -> show():\n{ctl.led_latency.stats.report()}")
+
+
+# ========= SKALOWANIE (długie paski) =========
+def _scale_scenarios(ctl, seconds):
+    def snake():
+        ctl.set_effect("snake_combo", fade=False)
+        time.sleep(seconds)
+        ctl.renderer.cancel("main", wait=1.0)
+
+    def crossfades():
+        t_end = time.monotonic() + seconds
+        names = ("red", "ww", "all_max", "blue")
+        i = 0
+        while time.monotonic() < t_end:
+            ctl.renderer.run_blocking("main", ctl.crossfade_to_frame(ctl.preview_frame(names[i % 4]), 0.5))
+            i += 1
+
+    def idle():
+        ctl.dc_idle_start()
+        time.sleep(seconds)
+        ctl.dc_idle_stop_fn()
+
+    return {"snake": snake, "crossfade": crossfades, "idle": idle}
+
+
+def cmd_scale(args):
+    os.environ["LED_FPS"] = str(args.fps)
+    os.environ["LED_RING_COUNT"] = "0"   # sama tablica: jeden kanał
+    print(f"cel {args.fps} FPS ({1000 / args.fps:.1f} ms/klatkę), "
+          f"przewód {'symulowany' if not args.no_wire else 'pominięty (--no-wire)'}, "
+          f"numpy {'tak' if np is not None else 'nie'}")
+    print(f"{'LED':>5} {'scenariusz':<10} {'FPS':>6} {'show/s':>7} {'CPU ms/kl':>10} "
+          f"{'max kl ms':>10} {'zgub.':>6} {'czek. DMA ms':>13}")
+    notes = []
+    for n in args.leds:
+        os.environ["LED_BOARD_COUNT"] = str(n)
+        ctl = load_controller()
+        st = ctl.strip
+        st.realtime = not args.no_wire
+        ctl.renderer.start()
+        try:
+            for name, fn in _scale_scenarios(ctl, args.seconds).items():
+                m = _measure(ctl, fn)
+                wait = "-" if args.no_wire else f"{m['wire_wait_ms']:.1f}"
+                print(f"{n:>5} {name:<10} {m['fps']:6.1f} {m['shows_s']:7.1f} {m['cpu_ms']:10.3f} "
+                      f"{m['frame_max_ms']:10.3f} {m['dropped']:6d} {wait:>13}")
+        finally:
+            ctl.renderer.stop()
+        # przewód: 24 bity/LED przy freq_hz + reset; show() czeka na poprzedni transfer
+        freq = ctl.PWM_FREQ_HZ
+        wire_fps = 1 / st.transfer_s
+        per_channel = int((1 / args.fps - WS281X_RESET_S) * freq / 24)
+        note = (f"{n} LED: transfer {st.transfer_s * 1000:.1f} ms/klatkę -> max {wire_fps:.0f} FPS na kanał")
+        if wire_fps < args.fps:
+            note += (f"; {args.fps} FPS mieści <= {per_channel} LED na kanał "
+                     f"(tablica to jeden pasek: mniej LED albo niższe LED_FPS)")
+        notes.append(note)
+    print()
+    for note in notes:
+        print(note)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarki silnika LED (bez sprzętu)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("blend", help="cross-fade: stara implementacja vs silnik led_frame")
+    p.add_argument("--leds", type=int, nargs="+", default=[28, 300, 1000])
+    p.add_argument("--steps", type=int, default=24)
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=cmd_blend)
+
+    p = sub.add_parser("run", help="efekty kontrolera na FakeStrip: FPS, show/s, CPU na klatkę")
+    p.add_argument("scenarios", nargs="*",
+                   help="snake_combo crossfade preempt gameshot bull idle (domyślnie wszystkie)")
+    p.add_argument("--fps", type=int, help="docelowy FPS pętli (LED_FPS)")
+    p.add_argument("--seconds", type=float, default=3.0, help="czas scenariusza idle")
+    p.add_argument("--no-wire", action="store_true", help="nie symuluj czasu transferu WS281x")
+    p.add_argument("--brightness", type=int, help="jasność w %% (brightness_level) na czas testu")
+    p.add_argument("--power-limit", type=float, help="budżet prądu [mA] (LED_POWER_LIMIT_MA) na czas testu")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("scale", help="długie paski: FPS i CPU na klatkę vs limit przewodu WS281x")
+    p.add_argument("--leds", type=int, nargs="+", default=[28, 300, 1000])
+    p.add_argument("--fps", type=int, default=60, help="docelowy FPS pętli (LED_FPS)")
+    p.add_argument("--seconds", type=float, default=3.0, help="czas każdego scenariusza")
+    p.add_argument("--no-wire", action="store_true", help="nie symuluj czasu transferu WS281x (sam CPU)")
+    p.set_defaults(func=cmd_scale)
+
+    p = sub.add_parser("classify", help="klasyfikacja linii darts-callera: linie/s przed i po")
+    p.add_argument("log", nargs="?", help="zapisany stdout darts-callera (domyślnie syntetyczny)")
+    p.add_argument("--lines", type=int, default=50_000, help="długość logu syntetycznego")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=cmd_classify)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
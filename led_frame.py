@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""Kompaktowy bufor klatki dla pasków WS281x.
+
+Piksel = jedna liczba 32-bit w array('I'), w tym samym formacie co Color()
+z rpi_ws281x: (W << 24) | (R << 16) | (G << 8) | B — więc wartość idzie
+prosto do strip.setPixelColor() bez pakowania krotek.
+"""
+
+import sys
+from array import array
+
+try:
+    import numpy as np   # opcjonalnie: szybkie przejścia dla długich pasków
+except ImportError:
+    np = None
+
+BLACK = 0
+
+
+def pack(r, g, b):
+    return (r << 16) | (g << 8) | b
+
+
+def unpack(c):
+    return (c >> 16) & 0xFF, (c >> 8) & 0xFF, c & 0xFF
+
+
+class FrameBuffer:
+    """Bufor N pikseli na array('I'); zapisy zakresów i co-drugiego piksela
+       idą przez przypisanie wycinka (C), bez tworzenia krotek i kopii list."""
+
+    __slots__ = ("n", "px")
+
+    def __init__(self, n, fill=BLACK):
+        self.n = n
+        self.px = array('I', [fill]) * n
+
+    @classmethod
+    def from_rgb(cls, frame):
+        """Z listy krotek (r,g,b) — tylko dla starego kodu/testów."""
+        fb = cls(len(frame))
+        fb.px[:] = array('I', [pack(r, g, b) for r, g, b in frame])
+        return fb
+
+    def to_rgb(self):
+        return [unpack(c) for c in self.px]
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        return self.px[i]
+
+    def __setitem__(self, i, c):
+        self.px[i] = c
+
+    def __eq__(self, other):
+        return isinstance(other, FrameBuffer) and self.px == other.px
+
+    def __repr__(self):
+        return f"FrameBuffer({self.n}, {self.to_rgb()!r})"
+
+    def copy(self):
+        fb = FrameBuffer.__new__(FrameBuffer)
+        fb.n = self.n
+        fb.px = array('I', self.px)
+        return fb
+
+    def copy_from(self, other, start=0, end=None):
+        """Przepisz [start,end) z innego bufora tej samej długości."""
+        end = self.n if end is None else min(end, self.n)
+        self.px[start:end] = other.px[start:end]
+
+    def load(self, frame):
+        """Wczytaj FrameBuffer albo listę krotek (r,g,b)."""
+        if isinstance(frame, FrameBuffer):
+            self.px[:len(frame.px)] = frame.px
+        else:
+            for i, (r, g, b) in enumerate(frame):
+                self.px[i] = pack(r, g, b)
+
+    # --- wypełnienia (wycinki w C) ---
+    def fill(self, c, start=0, end=None, step=1):
+        end = self.n if end is None else min(end, self.n)
+        count = len(range(start, end, step))
+        if count > 0:
+            self.px[start:end:step] = array('I', [c]) * count
+
+    def fill_even(self, c, start=0, end=None):
+        """Parzyste indeksy (bezwzględne) w [start,end) — piksele RGB."""
+        self.fill(c, start + (start & 1), end, 2)
+
+    def fill_odd(self, c, start=0, end=None):
+        """Nieparzyste indeksy (bezwzględne) w [start,end) — piksele WW/CW."""
+        self.fill(c, start + 1 - (start & 1), end, 2)
+
+    def mask(self, n):
+        """Wyzeruj piksele >= n."""
+        self.fill(BLACK, n)
+
+    # --- mieszanie ---
+    def blend(self, a, b, t):
+        """self = a + (b - a) * t, w miejscu; t w 0..1."""
+        self.blend_w(a, b, int(t * 256))
+
+    def blend_w(self, a, b, w):
+        """Jak blend(), ale waga całkowita w 0..256 (z tabeli fade_weights).
+           R i B liczone razem jednym mnożeniem (kanały nie zachodzą na siebie);
+           W (poziom bieli wg balansu) osobno."""
+        if w <= 0:
+            self.px[:] = a.px
+            return
+        if w >= 256:
+            self.px[:] = b.px
+            return
+        inv = 256 - w
+        self.px[:] = array('I', [
+            ((((x & 0xFF00FF) * inv + (y & 0xFF00FF) * w) >> 8) & 0xFF00FF)
+            | ((((x & 0x00FF00) * inv + (y & 0x00FF00) * w) >> 8) & 0x00FF00)
+            | ((((x >> 24) * inv + (y >> 24) * w) >> 8) << 24)
+            for x, y in zip(a.px, b.px)
+        ])
+
+
+# ========= RÓŻNICE KLATEK (commit) =========
+DIFF_CHUNK = 64         # bez NumPy: bloki porównywane w C, pętla tylko w zmienionych
+DIFF_NUMPY_MIN = 256    # krótsze zakresy: narzut NumPy większy niż zysk
+
+
+def changed(cur, old, start=0, end=None):
+    """Indeksy i w [start,end), gdzie cur[i] != old[i] (array('I') tej samej długości).
+       Koszt nie rośnie jak pętla Pythona po wszystkich pikselach: NumPy
+       porównuje wektorowo, a bez niego całe bloki porównuje C."""
+    end = len(cur) if end is None else end
+    if np is not None and end - start >= DIFF_NUMPY_MIN and cur.itemsize == 4:
+        a = np.frombuffer(cur, dtype=np.uint32)[start:end]
+        b = np.frombuffer(old, dtype=np.uint32)[start:end]
+        return (np.flatnonzero(a != b) + start).tolist()
+    out = []
+    for s in range(start, end, DIFF_CHUNK):
+        e = min(s + DIFF_CHUNK, end)
+        if cur[s:e] != old[s:e]:
+            out += [i for i in range(s, e) if cur[i] != old[i]]
+    return out
+
+
+# ========= PRZEJŚCIA (CROSS-FADE) =========
+def fade_weights(steps):
+    """Wagi 0..256 dla kroków 1..steps (t = s/steps), liczone raz na przejście."""
+    return [(s * 256) // steps for s in range(1, steps + 1)]
+
+
+class Crossfade:
+    """Przejście start -> target w `steps` krokach.
+       Z NumPy całe przejście liczone jest jedną operacją (steps × N × 4) i krok
+       to tylko memcpy wiersza; bez NumPy — tabela wag + blend_w() na krok.
+       Wynik identyczny w obu trybach: x + floor((y - x) * w / 256)."""
+
+    def __init__(self, start, target, steps, use_numpy=True):
+        self.steps = steps
+        self.weights = fade_weights(steps)
+        self.frames = None
+        if use_numpy and np is not None and start.px.itemsize == 4:
+            self.frames = _np_fade_frames(start, target, self.weights)
+        else:
+            self.start = start.copy()
+            self.target = target
+
+    def apply(self, s, out):
+        """Wpisz krok s (0..steps-1) do bufora `out`."""
+        if self.frames is not None:
+            memoryview(out.px).cast('B')[:] = self.frames[s].view(np.uint8)
+        else:
+            out.blend_w(self.start, self.target, self.weights[s])
+
+
+def _np_fade_frames(start, target, weights):
+    shifts = np.array([24, 16, 8, 0], dtype=np.uint32)
+    a = (np.frombuffer(start.px, dtype=np.uint32)[:, None] >> shifts) & 0xFF
+    b = (np.frombuffer(target.px, dtype=np.uint32)[:, None] >> shifts) & 0xFF
+    a = a.astype(np.int32)
+    d = b.astype(np.int32) - a
+    w = np.array(weights, dtype=np.int32)[:, None, None]
+    ch = (a + ((d * w) >> 8)).astype(np.uint32)          # steps × N × 4
+    return np.ascontiguousarray((ch[..., 0] << 24) | (ch[..., 1] << 16) | (ch[..., 2] << 8) | ch[..., 3])
+
+
+# ========= KOREKCJA KOLORU (przy commicie) =========
+# Bajty piksela w array('I') (W<<24 | R<<16 | G<<8 | B) w pamięci maszyny;
+# co drugi piksel = krok 8 bajtów, przesunięcie +4 = piksel nieparzysty.
+if sys.byteorder == "little":
+    BYTE_B, BYTE_G, BYTE_R, BYTE_W = 0, 1, 2, 3
+else:
+    BYTE_B, BYTE_G, BYTE_R, BYTE_W = 3, 2, 1, 0
+_OB, _OG, _OR, _OW = BYTE_B, BYTE_G, BYTE_R, BYTE_W
+
+IDENTITY = bytes(range(256))
+
+
+def gamma_table(gamma):
+    """256 bajtów: v -> round(255 * (v/255) ** gamma); 1.0 = tożsamość."""
+    if gamma == 1.0:
+        return IDENTITY
+    return bytes(round(255 * (v / 255) ** gamma) for v in range(256))
+
+
+def _add_sat(a, b):
+    """Bajty a + b z nasyceniem; gdy się nie nakładają — OR na dużych intach (C)."""
+    x, y = int.from_bytes(a, "little"), int.from_bytes(b, "little")
+    if not x & y:
+        return (x | y).to_bytes(len(a), "little")
+    return bytes(min(255, p + q) for p, q in zip(a, b))
+
+
+class ColorStage:
+    """Korekcja klatki raz na commit, tablicami 256-elementowymi:
+         - parzyste (RGB): krzywa `rgb` na R, G, B,
+         - nieparzyste (WW=R, CW=B): krzywa `white`; bajt W (bity 24..31,
+           żaden efekt go nie pisze) niesie 'biel wg balansu' (poziom 0..255)
+           — tablice miksu rozkładają go na WW/CW, a na pasek W idzie jako 0.
+       Efekty piszą więc wartości liniowe, a zmiana balansu to nowe tablice
+       miksu (bez przerysowania warstw). Wszystko przez bytes.translate na
+       wycinkach co 8 bajtów — bez pętli po pikselach."""
+
+    def __init__(self, gamma_rgb=1.0, gamma_white=1.0, balance=0.5):
+        self.rgb = gamma_table(gamma_rgb)
+        self.white = gamma_table(gamma_white)
+        self.set_balance(balance)
+
+    def set_balance(self, balance):
+        """0.0 = 100% WW, 1.0 = 100% CW (jak dawne whites_from_balance)."""
+        self.balance = balance
+        w = self.white
+        self.mix_ww = bytes(w[int((1.0 - balance) * v)] for v in range(256))
+        self.mix_cw = bytes(w[int(balance * v)] for v in range(256))
+
+    def apply(self, src, dst, start=0, end=None):
+        """dst[start:end] = skorygowana src (FrameBuffery tej samej długości;
+           start parzysty — nieparzyste piksele paska to WW/CW)."""
+        end = src.n if end is None else end
+        b = memoryview(src.px).cast('B')[start * 4:end * 4].tobytes()
+        out = memoryview(dst.px).cast('B')[start * 4:end * 4]
+        bal = b[4 + _OW::8]
+        if self.rgb is IDENTITY and self.white is IDENTITY and not bal.strip(b"\0"):
+            out[:] = b   # nic do korekcji
+            return
+        for o in (_OB, _OG, _OR):
+            out[o::8] = b[o::8].translate(self.rgb)
+        out[4 + _OG::8] = b[4 + _OG::8].translate(self.white)
+        ww = b[4 + _OR::8].translate(self.white)
+        cw = b[4 + _OB::8].translate(self.white)
+        if bal.strip(b"\0"):
+            ww = _add_sat(ww, bal.translate(self.mix_ww))
+            cw = _add_sat(cw, bal.translate(self.mix_cw))
+        out[4 + _OR::8] = ww
+        out[4 + _OB::8] = cw
+        out[_OW::4] = bytes(len(b[_OW::4]))
+
+    def apply_rgb(self, src, dst, start=0, end=None):
+        """Pasek bez bieli (np. ring): krzywa `rgb` na każdym pikselu, W = 0."""
+        end = src.n if end is None else end
+        b = memoryview(src.px).cast('B')[start * 4:end * 4].tobytes()
+        out = memoryview(dst.px).cast('B')[start * 4:end * 4]
+        for o in (_OB, _OG, _OR):
+            out[o::4] = b[o::4].translate(self.rgb)
+        out[_OW::4] = bytes(len(b[_OW::4]))
@@ -1,14 +1,21 @@
-from rpi_ws281x import PixelStrip, Color, ws
-from evdev import InputDevice, ecodes
-import RPi.GPIO as GPIO
+try:
+    from evdev import InputDevice, ecodes
+except ImportError:   # np. test na zwykłym Linuksie (LED_BACKEND=fake)
+    InputDevice = ecodes = None
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None
 import time
 import threading
-import subprocess
 import signal
 from queue import Queue, Empty
 from math import ceil
 import select
 
+from led_backend import open_strip, strip_type
+from led_frame import pack as Color   # to samo co rpi_ws281x.Color(r, g, b)
+
 # --- Konfiguracja paska ---
 LED_COUNT = 28
 LED_PIN = 18
@@ -16,7 +23,7 @@ LED_DMA = 10
 LED_FREQ_HZ = 800_000
 LED_INVERT = False
 LED_CHANNEL = 0
-STRIP_TYPE = ws.WS2811_STRIP_BRG
+STRIP_TYPE = strip_type("BRG")
 
 # --- Presety jasności (w %)
 PRESET_LEVELS = [10, 25, 50, 75, 100]
@@ -38,13 +45,12 @@ IR_LBL = 0xef06
 IR_DIM = 0xef1d
 IR_BRIGHT = 0xef1c
 
-# --- Inicjalizacja stripu ---
-strip = PixelStrip(
+# --- Inicjalizacja stripu (LED_BACKEND=fake -> FakeStrip, bez sprzętu) ---
+strip = open_strip(
     LED_COUNT, LED_PIN, LED_FREQ_HZ, LED_DMA, LED_INVERT,
     255,  # sterownik na 0..255; realny poziom regulujemy setBrightness()
-    LED_CHANNEL, strip_type=STRIP_TYPE
+    LED_CHANNEL, STRIP_TYPE
 )
-strip.begin()
 
 # --- Stan / synchronizacja ---
 state_lock = threading.Lock()
@@ -446,17 +452,10 @@ def preset_next_action():
     apply_brightness()
 
 # ---------- Uruchomienie / sprzątanie ----------
-proc = None  # uchwyt do subprocess
-
-def launch_subprocess():
-    global proc
-    try:
-        proc = subprocess.Popen(["python3", "/home/raczqq/darts-caller/dart-caller-listener.py"])
-    except Exception as e:
-        print(f"Nie mogę uruchomić listenera darta: {e}")
-
+# (ring i zdarzenia darts-callera obsługuje autodarts-led-controller.py —
+#  dart-caller-listener.py nie jest już uruchamiany stąd)
 def on_exit(*_):
-    global running, ir_dev, proc
+    global running, ir_dev
     print("Zamykanie...")
     running = False
 
@@ -467,21 +466,14 @@ def on_exit(*_):
     except Exception:
         pass
 
-    # zatrzymaj proces potomny
-    if proc and proc.poll() is None:
-        try:
-            proc.terminate()
-            proc.wait(timeout=3)
-        except subprocess.TimeoutExpired:
-            proc.kill()
-
     # wyczyść LEDy i GPIO
     try:
         clear(show=True)
     except Exception:
         pass
     try:
-        GPIO.cleanup()
+        if GPIO is not None:
+            GPIO.cleanup()
     except Exception:
         pass
         
@@ -492,7 +484,6 @@ if __name__ == "__main__":
     worker = threading.Thread(target=effects_worker, daemon=True)
     worker.start()
 
-    #launch_subprocess()
     apply_brightness(show=False)
     set_effect("snake_combo", fade=False)
 
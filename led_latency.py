@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Opóźnienie zdarzenie -> światło (IR, dart-caller).
+
+Każde zdarzenie dostaje Trace ze znacznikiem przyjścia (time.monotonic) i
+kolejnymi etapami (np. "classified", "queued", "applied", "shown"). Każdy
+etap to próbka "ile od przyjścia" w histogramie per (typ, etap); "shown"
+zaznacza pętla renderująca po strip.show() klatki, która niesie zmianę.
+
+Wątek, który obsługuje zdarzenie, robi to w `with traced(trace):` — wtedy
+request_frame()/submit() same podpinają trace do najbliższej klatki.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+
+STAGE_SHOWN = "shown"
+# kolejność etapów w raporcie (inne nazwy trafiają na koniec)
+STAGES = ("classified", "queued", "dequeued", "applied", STAGE_SHOWN)
+
+
+class LatencyStats:
+    """Ostatnie `keep` próbek na (typ, etap); percentyle liczone przy raporcie."""
+
+    def __init__(self, keep=2000):
+        self.keep = keep
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=self.keep))
+
+    def add(self, kind, stage, seconds):
+        with self.lock:
+            self.samples[(kind, stage)].append(seconds)
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        """{(typ, etap): (n, p50, p95, p99, max)} w sekundach."""
+        with self.lock:
+            items = [(k, sorted(v)) for k, v in self.samples.items() if v]
+        rank = {s: i for i, s in enumerate(STAGES)}
+        items.sort(key=lambda kv: (kv[0][0], rank.get(kv[0][1], len(STAGES)), kv[0][1]))
+        return {k: (len(v), percentile(v, 50), percentile(v, 95), percentile(v, 99), v[-1])
+                for k, v in items}
+
+    def report(self):
+        rows = self.summary()
+        if not rows:
+            return "brak zdarzeń"
+        lines = [f"{'zdarzenie':<22} {'etap':<11} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} "
+                 f"{'p99 ms':>8} {'max ms':>8}"]
+        for (kind, stage), (n, p50, p95, p99, mx) in rows.items():
+            lines.append(f"{kind:<22} {stage:<11} {n:>5} {p50*1000:8.2f} {p95*1000:8.2f} "
+                         f"{p99*1000:8.2f} {mx*1000:8.2f}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Dopisz raport (ze znacznikiem czasu) do pliku."""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"# {time.strftime('%Y-%m-%d %H:%M:%S')}\n{self.report()}\n\n")
+
+
+def percentile(sorted_values, p):
+    """Percentyl metodą najbliższej rangi (lista już posortowana)."""
+    n = len(sorted_values)
+    k = max(0, min(n - 1, -(-p * n // 100) - 1))
+    return sorted_values[k]
+
+
+stats = LatencyStats()
+
+
+class Trace:
+    """Jedno zdarzenie: typ + czas przyjścia; mark() zapisuje próbkę od razu."""
+
+    __slots__ = ("kind", "t0", "shown")
+
+    def __init__(self, kind, t0=None):
+        self.kind = kind
+        self.t0 = time.monotonic() if t0 is None else t0
+        self.shown = False
+
+    def mark(self, stage):
+        stats.add(self.kind, stage, time.monotonic() - self.t0)
+
+    def mark_shown(self):
+        """Pierwsza klatka ze zmianą poszła na pasek (kolejne już się nie liczą)."""
+        if not self.shown:
+            self.shown = True
+            self.mark(STAGE_SHOWN)
+
+
+def monotonic_from_wall(ts):
+    """Znacznik z zegara ściennego (np. evdev event.timestamp()) -> time.monotonic()."""
+    return time.monotonic() - max(0.0, time.time() - ts)
+
+
+# --- kontekst: trace zdarzenia obsługiwanego w bieżącym wątku
+_ctx = threading.local()
+
+
+def current_trace():
+    return getattr(_ctx, "trace", None)
+
+
+class traced:
+    """with traced(trace): zmiany zgłoszone w tym wątku niosą trace do pętli."""
+
+    def __init__(self, trace):
+        self.trace = trace
+
+    def __enter__(self):
+        self.prev = current_trace()
+        _ctx.trace = self.trace
+        return self.trace
+
+    def __exit__(self, *exc):
+        _ctx.trace = self.prev
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""Logowanie usługi: poziomy, zapis w tle paczkami, bufor ostatnich linii, limity.
+
+Wątek obsługujący zdarzenie tylko formatuje linię i dokłada ją do kolejki;
+jeden wątek w tle zapisuje paczki na stdout (journald) jednym write().
+Ostatnie LOG_RING linii — także DEBUG, którego domyślnie nie wypisujemy —
+trzyma bufor pierścieniowy: dump_ring() przy awarii i na SIGUSR1.
+
+  LOG_LEVEL=DEBUG|INFO|WARNING|ERROR   (domyślnie INFO)
+  LOG_RING=500                         (linii w buforze pierścieniowym)
+
+  log = led_log.get("dc", rate=20)     # max ~20 linii/s na stdout
+  log.info("zdarzenie %s", kind)       # formatowanie dopiero gdy potrzebne
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+_TAG = {DEBUG: "D", INFO: "I", WARNING: "W", ERROR: "E"}
+
+LEVEL = LEVELS.get(os.getenv("LOG_LEVEL", "INFO").upper(), INFO)
+RING_SIZE = int(os.getenv("LOG_RING", "500"))
+
+FLUSH_S = 0.1        # ile writer czeka na resztę paczki
+BATCH = 64           # paczka pełna -> zapis od razu
+MAX_PENDING = 5000   # stdout nie nadąża -> nowe linie wypadają (licznik dropped)
+
+ring = deque(maxlen=RING_SIZE)
+
+
+def _stamp(t, _cache=[None, ""]):
+    sec = int(t)
+    if _cache[0] != sec:
+        _cache[0], _cache[1] = sec, time.strftime("%H:%M:%S", time.localtime(sec))
+    return f"{_cache[1]}.{int((t - sec) * 1000):03d}"
+
+
+class _Writer:
+    """Jeden wątek w tle: zbiera linie i zapisuje je paczkami."""
+
+    def __init__(self, out):
+        self.out = out
+        self.cond = threading.Condition()
+        self.io_lock = threading.Lock()
+        self.pending = deque()
+        self.thread = None
+        self.closed = False
+        self.stats = {"lines": 0, "writes": 0, "dropped": 0}
+
+    def put(self, line):
+        with self.cond:
+            if len(self.pending) >= MAX_PENDING:
+                self.stats["dropped"] += 1
+                return
+            self.pending.append(line)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="led-log", daemon=True)
+                self.thread.start()
+            n = len(self.pending)
+            if n == 1 or n >= BATCH:
+                self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                if len(self.pending) < BATCH and not self.closed:
+                    self.cond.wait(FLUSH_S)   # zbierz paczkę
+                batch, self.pending = self.pending, deque()
+            self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        with self.io_lock:
+            try:
+                self.out.write("\n".join(batch) + "\n")
+                self.out.flush()
+            except (OSError, ValueError):
+                return
+            self.stats["lines"] += len(batch)
+            self.stats["writes"] += 1
+
+    def flush(self):
+        """Zapisz wszystko od razu (wyjście, awaria)."""
+        with self.cond:
+            batch, self.pending = self.pending, deque()
+        self._write(batch)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(1.0)
+        self.flush()
+
+
+writer = _Writer(sys.stdout)
+
+
+class Logger:
+    """Logger źródła `name`; rate = max linii/s na stdout (kubełek żetonów,
+       nadmiar tylko w buforze pierścieniowym + licznik pominiętych)."""
+
+    def __init__(self, name, rate=None, burst=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst or (rate * 2 if rate else 0)
+        self.tokens = self.burst
+        self.last = time.monotonic()
+        self.suppressed = 0
+
+    def enabled(self, level):
+        return level >= LEVEL
+
+    def _allow(self, now):
+        if self.rate is None:
+            return True
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.suppressed += 1
+        return False
+
+    def log(self, level, msg, *args):
+        t = time.time()
+        if args:
+            try:
+                msg = msg % args
+            except (TypeError, ValueError):
+                msg = f"{msg} {args!r}"
+        line = f"{_stamp(t)} {_TAG.get(level, '?')} [{self.name}] {msg}"
+        ring.append(line)
+        if level < LEVEL or not self._allow(time.monotonic()):
+            return
+        if self.suppressed:
+            writer.put(f"{_stamp(t)} W [{self.name}] (pominięto {self.suppressed} linii — limit {self.rate}/s)")
+            self.suppressed = 0
+        writer.put(line)
+
+    def debug(self, msg, *args):
+        self.log(DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(WARNING, msg, *args)
+
+    def error(self, msg, *args):
+        self.log(ERROR, msg, *args)
+
+    def exception(self, msg, *args):
+        """ERROR + traceback bieżącego wyjątku (w except:)."""
+        self.log(ERROR, "%s\n%s", msg % args if args else msg, traceback.format_exc().rstrip())
+
+
+_loggers = {}
+
+
+def get(name, rate=None, burst=None):
+    lg = _loggers.get(name)
+    if lg is None:
+        lg = _loggers[name] = Logger(name, rate, burst)
+    return lg
+
+
+def flush():
+    writer.flush()
+
+
+def report():
+    s = writer.stats
+    return (f"linie {s['lines']} w {s['writes']} zapisach, wyrzucone {s['dropped']}, "
+            f"pominięte (limit) {sum(lg.suppressed for lg in _loggers.values())}")
+
+
+def dump_ring(path, reason=""):
+    """Dopisz bufor ostatnich linii do pliku (z nagłówkiem i powodem)."""
+    lines = list(ring)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"# {time.strftime('%Y-%m-%d %H:%M:%S')} {reason} ({len(lines)} linii)\n")
+        f.write("\n".join(lines) + "\n\n")
+
+
+def install_crash_dump(path):
+    """Nieobsłużony wyjątek (wątek główny i inne wątki) -> ERROR z tracebackiem,
+       zapis zaległych linii i zrzut bufora pierścieniowego do `path`."""
+    log = get("crash")
+
+    def _dump(exc_type, exc, tb, where):
+        log.error("nieobsłużony wyjątek (%s):\n%s", where,
+                  "".join(traceback.format_exception(exc_type, exc, tb)).rstrip())
+        flush()
+        try:
+            dump_ring(path, f"awaria: {where}")
+        except OSError:
+            pass
+
+    prev_hook = sys.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        _dump(exc_type, exc, tb, "main")
+        prev_hook(exc_type, exc, tb)
+
+    def thread_hook(args):
+        _dump(args.exc_type, args.exc_value, args.exc_traceback,
+              args.thread.name if args.thread else "thread")
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_hook
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Budżet prądu zasilacza 5 V: szacunek na klatkę + limit jasnością paska.
+
+Prąd klatki liczony z sum kanałów tego, co idzie na pasek (po korekcji):
+  I = n * MA_IDLE + (suma RGB even * MA_RGB + suma WW/CW odd * MA_WHITE) / 255
+        * (jasność + 1) / 256
+(pasek bez bieli, np. ring: wszystkie piksele liczone jako RGB)
+(ws281x skaluje kanały rejestrem jasności liniowo). Gdy I > budżet, commit
+ustawia niższy rejestr jasności — klatka i warstwy zostają, koszt to kilka
+sum na wycinkach bajtów (tylko gdy klatka się zmieniła).
+
+  LED_POWER_LIMIT_MA=0     budżet [mA] (0 = tylko pomiar, bez limitu)
+  LED_MA_RGB=20            mA kanału R/G/B przy 255
+  LED_MA_WHITE=20          mA kanału WW/CW przy 255
+  LED_MA_IDLE=1            mA spoczynkowe na diodę
+  LED_VOLTS=5.0            do energii [Wh]
+"""
+
+import os
+import time
+
+from led_frame import BYTE_B, BYTE_G, BYTE_R
+
+
+class PowerLimiter:
+    """spans = [(start, end, whites)] — zakresy klatki po paskach; whites=True:
+       nieparzyste to WW/CW (start parzysty). Domyślnie cała klatka z bielą."""
+
+    def __init__(self, n, limit_ma=None, ma_rgb=None, ma_white=None, ma_idle=None, volts=None,
+                 spans=None):
+        env = os.getenv
+        self.n = n
+        self.spans = spans or [(0, n, True)]
+        self.limit_ma = float(env("LED_POWER_LIMIT_MA", "0") if limit_ma is None else limit_ma)
+        self.ma_rgb = float(env("LED_MA_RGB", "20") if ma_rgb is None else ma_rgb)
+        self.ma_white = float(env("LED_MA_WHITE", "20") if ma_white is None else ma_white)
+        self.ma_idle = float(env("LED_MA_IDLE", "1") if ma_idle is None else ma_idle)
+        self.volts = float(env("LED_VOLTS", "5.0") if volts is None else volts)
+        self.load = None       # mA przy jasności 255 (bez spoczynkowego), z ostatniej klatki
+        self.current = 0.0     # mA teraz (z rejestrem jasności)
+        self.last_t = None
+        # pomiary
+        self.mas = 0.0         # całka prądu [mA*s]
+        self.seconds = 0.0
+        self.peak = 0.0
+        self.limited = 0       # klatki przyciemnione przez limit
+        self.limited_s = 0.0
+        self.limited_now = False
+
+    def measure(self, frame):
+        """Sumy kanałów klatki (wywołać, gdy klatka na pasek się zmieniła)."""
+        mv = memoryview(frame.px).cast('B')
+        rgb = white = 0
+        for start, end, whites in self.spans:
+            b = mv[start * 4:end * 4].tobytes()
+            if whites:
+                rgb += sum(b[BYTE_R::8]) + sum(b[BYTE_G::8]) + sum(b[BYTE_B::8])
+                white += sum(b[4 + BYTE_R::8]) + sum(b[4 + BYTE_G::8]) + sum(b[4 + BYTE_B::8])
+            else:
+                rgb += sum(b[BYTE_R::4]) + sum(b[BYTE_G::4]) + sum(b[BYTE_B::4])
+        self.load = (rgb * self.ma_rgb + white * self.ma_white) / 255
+
+    def estimate(self, brightness):
+        """mA dla ostatnio zmierzonej klatki przy danym rejestrze jasności."""
+        return self.n * self.ma_idle + (self.load or 0.0) * (brightness + 1) / 256
+
+    def limit(self, brightness):
+        """Rejestr jasności <= brightness mieszczący klatkę w budżecie."""
+        if self.limit_ma <= 0 or not self.load or self.estimate(brightness) <= self.limit_ma:
+            return brightness
+        room = self.limit_ma - self.n * self.ma_idle
+        return max(0, min(brightness, int(room * 256 / self.load) - 1))
+
+    def account(self, brightness, limited, now=None):
+        """Całkuj prąd do `now` (poprzednia wartość trwała od ostatniego wywołania)."""
+        now = time.monotonic() if now is None else now
+        if self.last_t is not None:
+            dt = now - self.last_t
+            self.mas += self.current * dt
+            self.seconds += dt
+            if self.limited_now:
+                self.limited_s += dt
+        self.last_t = now
+        self.current = self.estimate(brightness)
+        self.peak = max(self.peak, self.current)
+        self.limited_now = limited
+        if limited:
+            self.limited += 1
+
+    def energy_wh(self):
+        return self.mas / 3600 / 1000 * self.volts
+
+    def report(self):
+        avg = self.mas / self.seconds if self.seconds else 0.0
+        lim = f"limit {self.limit_ma:.0f} mA" if self.limit_ma > 0 else "bez limitu"
+        return (f"teraz {self.current:.0f} mA, średnio {avg:.0f} mA, szczyt {self.peak:.0f} mA ({lim}); "
+                f"przyciemnione klatki {self.limited} ({self.limited_s:.1f} s); "
+                f"energia {self.energy_wh():.3f} Wh w {self.seconds / 3600:.2f} h")
@@ -1,5 +1,7 @@
 import time
-from rpi_ws281x import PixelStrip, Color, ws
+
+from led_backend import open_strip, strip_type
+from led_frame import pack as Color   # to samo co rpi_ws281x.Color(r, g, b)
 
 # --- konfiguracja LED ---
 LED_COUNT = 22
@@ -10,17 +12,16 @@ LED_BRIGHTNESS = 128       # umiarkowanie, łatwiej ocenić kolory
 LED_INVERT = False
 LED_CHANNEL = 0
 
-# mapowanie nazw dla czytelnego wyniku
-TYPE_LABELS = {
-    #ws.WS2811_STRIP_RGB: "WS2811_STRIP_RGB",
-    #ws.WS2811_STRIP_RBG: "WS2811_STRIP_RBG",
-    #ws.WS2811_STRIP_GRB: "WS2811_STRIP_GRB",
-    #ws.WS2811_STRIP_GBR: "WS2811_STRIP_GBR",
-    ws.WS2811_STRIP_BRG: "WS2811_STRIP_BRG",
-    #ws.WS2811_STRIP_BGR: "WS2811_STRIP_BGR",
-}
-
-TYPES = list(TYPE_LABELS.keys())
+# testowane typy (nazwy stałych ws.WS2811_STRIP_<nazwa>)
+TYPES = [
+    #"RGB",
+    #"RBG",
+    #"GRB",
+    #"GBR",
+    "BRG",
+    #"BGR",
+]
+TYPE_LABELS = {t: f"WS2811_STRIP_{t}" for t in TYPES}
 
 def clear(strip):
     for i in range(LED_COUNT):
@@ -71,11 +72,10 @@ if __name__ == "__main__":
     for t in TYPES:
         print("="*60)
         print(f"Test STRIP_TYPE: {TYPE_LABELS[t]}")
-        strip = PixelStrip(
+        strip = open_strip(
             LED_COUNT, LED_PIN, LED_FREQ_HZ, LED_DMA, LED_INVERT,
-            LED_BRIGHTNESS, LED_CHANNEL, strip_type=t
+            LED_BRIGHTNESS, LED_CHANNEL, strip_type(t)
         )
-        strip.begin()
         try:
             # 1) Test RGB na parzystych
             show_rgb_sequence_even(strip)
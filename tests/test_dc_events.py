@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Koalescencja kolejki zdarzeń z parami z reguł wbudowanych."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dc_events
+import dc_rules
+
+
+def _queue(zones=("dart", "ring")):
+    rules = dc_rules.default_rules(zones)
+    return dc_events.EventQueue(supersedes=dc_rules.supersedes(rules))
+
+
+def _put(q, *kinds):
+    for kind in kinds:
+        q.put(dc_events.DcEvent(kind, kind, 0.0))
+    return [ev.kind for ev, _ in q.items]
+
+
+def test_gameshot_then_match_end_keeps_both():
+    q = _queue()
+    assert _put(q, dc_events.GAMESHOT, dc_events.MATCH_END) == ["gameshot", "match_end"]
+    assert q.stats["coalesced"] == 0
+
+
+def test_matchon_then_bull_keeps_both():
+    # bull na ringu to keep/restore — nie czyści tego, co pokazałby matchon
+    q = _queue()
+    assert _put(q, dc_events.MATCHON, dc_events.BULL) == ["matchon", "bull"]
+
+
+def test_replace_on_same_zones_supersedes():
+    q = _queue()
+    assert _put(q, dc_events.MATCHON, dc_events.BUSTED) == ["busted"]
+    assert q.stats["coalesced"] == 1
+
+
+def test_takeout_never_superseded():
+    q = _queue()
+    assert _put(q, dc_events.TAKEOUT_START, dc_events.MATCHON) == ["takeout_start", "matchon"]
+    assert _put(q, dc_events.TAKEOUT_END) == ["takeout_start", "matchon", "takeout_end"]
+
+
+def test_takeout_pair_cancels():
+    q = _queue()
+    assert _put(q, dc_events.BUSTED, dc_events.TAKEOUT_START, dc_events.TAKEOUT_END) == ["busted"]
+
+
+def test_no_rules_no_coalescing():
+    q = dc_events.EventQueue()
+    assert _put(q, dc_events.MATCHON, dc_events.BUSTED) == ["matchon", "busted"]